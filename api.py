@@ -0,0 +1,278 @@
+from contextlib import asynccontextmanager
+from typing import Dict, List, Literal, Optional
+
+import pandas as pd
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+
+from engine import metrics
+from engine.batch import ROW_COLUMNS, OUTPUT_COLUMNS, score_frame
+from engine.cache import cached_predictions, predictions
+from engine.data import DATA_PATH, source_stats
+from engine.ingest import ingest
+from engine.microbatch import MicroBatcher
+from engine.models import activate, get_model, is_loaded, model_version
+from engine.registry import has_compact, read_manifest
+from engine.recommendations import rank
+from engine.scoring import SCALED_COLUMNS, grid_divisions, winner_map
+from engine.warmup import warm_up
+
+# Headless scoring service (no Streamlit). Run with e.g.
+#   uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+# Each worker loads the model pipeline once at startup.
+
+
+# REQUEST / RESPONSE SCHEMAS
+class Weights(BaseModel):
+    time_w: float = Field(0.4, ge=0, le=1)
+    cost_w: float = Field(0.4, ge=0, le=1)
+    oar_w: float = Field(0.2, ge=0, le=1)
+
+
+class SourceStats(BaseModel):
+    a: float = Field(ge=0, allow_inf_nan=False, description="num_applicants")
+    t: float = Field(ge=0, allow_inf_nan=False, description="time_to_hire_days")
+    c: float = Field(ge=0, allow_inf_nan=False, description="cost_per_hire")
+    o: float = Field(ge=0, le=1, allow_inf_nan=False, description="offer_acceptance_rate")
+
+
+class RecommendRequest(Weights):
+    department: str
+    job_title: str
+    # Omitted: per-source medians of the reference dataset (Optimal Score page),
+    # with either scaling.
+    sources: Optional[Dict[str, SourceStats]] = None
+    scaling: Literal["model", "relative"] = "model"
+
+
+class Requisition(BaseModel):
+    department: str
+    job_title: str
+    source: str
+    num_applicants: float = Field(ge=0, allow_inf_nan=False)
+    time_to_hire_days: float = Field(ge=0, allow_inf_nan=False)
+    cost_per_hire: float = Field(ge=0, allow_inf_nan=False)
+    offer_acceptance_rate: float = Field(ge=0, le=1, allow_inf_nan=False)
+
+
+class ScoreRequest(Weights, Requisition):
+    pass
+
+
+class BatchScoreRequest(Weights):
+    rows: List[Requisition] = Field(max_length=100_000)
+
+
+class RecruitmentRow(Requisition):
+    recruitment_id: int
+    num_applicants: int = Field(ge=0)
+    time_to_hire_days: int = Field(ge=0)
+
+
+class IngestRequest(BaseModel):
+    rows: List[RecruitmentRow] = Field(max_length=100_000)
+
+
+class IngestResult(BaseModel):
+    added: int
+    rejected: List[int]
+
+
+class SensitivityRequest(BaseModel):
+    department: str
+    job_title: str
+    step: float = Field(0.01, ge=0.005, le=0.5)
+
+
+class SensitivityMap(BaseModel):
+    step: float
+    sources: List[str]
+    shares: Dict[str, float]
+    weights: List[List[float]] = Field(description="[time_w, cost_w, oar_w] per grid point")
+    best_source: List[str]
+    margin: List[float]
+
+
+class SourceScore(BaseModel):
+    source: str
+    pred_time: float
+    pred_cost: float
+    pred_oar: float
+    scaled_time: float
+    scaled_cost: float
+    scaled_oar: float
+    optimal_score: float
+
+
+class RowScore(BaseModel):
+    pred_time: float
+    pred_cost: float
+    pred_oar: float
+    scaled_time: float
+    scaled_cost: float
+    scaled_oar: float
+    optimal_score: float
+
+
+# VALIDATION
+def check_weights(req):
+    if abs((req.time_w + req.cost_w + req.oar_w) - 1) >= 0.001:
+        raise HTTPException(status_code=422, detail="time_w + cost_w + oar_w must be 1")
+
+
+def check_labels(triples):
+    index = get_model().features.model_index
+    for triple in set(triples):
+        for prefix, label in zip(("department_", "job_title_", "source_"), triple):
+            if f"{prefix}{label}" not in index:
+                raise HTTPException(status_code=422, detail=f"Unknown {prefix[:-1]}: {label}")
+
+
+# Predictions for the reference per-source stats: from the recommendation
+# table, or the model for pairs outside it and for other scalings. The same
+# labels are accepted, with the same errors, whatever the path.
+def reference_predictions(dept, job, scaling="model"):
+    check_labels([(dept, job, src) for src in source_stats(DATA_PATH)])
+    return cached_predictions(dept, job, scaling=scaling)
+
+
+# MICRO-BATCHED ROW SCORING
+# Concurrent /score requests are grouped and scored with one model call;
+# each row keeps its own weights.
+def _score_requests(items):
+    df = pd.DataFrame([item.model_dump() for item in items])
+    scored = score_frame(df[ROW_COLUMNS], df["time_w"].to_numpy(), df["cost_w"].to_numpy(), df["oar_w"].to_numpy())
+    return scored[OUTPUT_COLUMNS].to_dict("records")
+
+
+batcher = MicroBatcher(_score_requests)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_threadpool(lambda: get_model().features)
+    batcher.start()
+    metrics.start_json_log()
+    yield
+    await batcher.stop()
+    await run_in_threadpool(metrics.stop_json_log)
+
+
+app = FastAPI(title="Recruitment Scoring API", lifespan=lifespan)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "model_loaded": is_loaded()}
+
+
+# Readiness probe: answers once the model, predictor, dataset aggregates and
+# recommendation table are loaded, with the time each step took (seconds).
+@app.get("/ready")
+async def ready():
+    return {"status": "ready", "timings": await run_in_threadpool(warm_up)}
+
+
+# Per-stage timings (recorded when STAGE_TIMINGS=1, see engine/metrics.py)
+@app.get("/metrics", response_class=PlainTextResponse)
+def stage_metrics():
+    return metrics.prometheus() + predictions.prometheus("recruitment_prediction_cache")
+
+
+@app.get("/metrics.json")
+def stage_metrics_json():
+    return {"enabled": metrics.is_enabled(), "stages": metrics.snapshot(), "prediction_cache": predictions.stats()}
+
+
+# MODEL VERSIONS (models/manifest.json, see engine/registry.py)
+@app.get("/models")
+def models():
+    manifest = read_manifest()
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="No models/manifest.json, run python -m engine.registry")
+    artifacts = {
+        version: {**artifact, "compact": has_compact(version, artifact)}
+        for version, artifact in manifest["artifacts"].items()
+    }
+    return {**manifest, "artifacts": artifacts, "serving": model_version() if is_loaded() else None}
+
+
+# Switches every worker to another version: each one loads it in the
+# background and keeps answering with the current one until it is ready.
+@app.post("/models/{version}/activate")
+def activate_model(version: str):
+    try:
+        activate(version)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"active": version, "serving": model_version()}
+
+
+# INGESTION (see engine/ingest.py)
+# Appends new recruitment rows; this worker's cached aggregates are updated
+# from them directly, the other workers and the app read only the appended
+# files.
+@app.post("/ingest", response_model=IngestResult)
+def ingest_rows(req: IngestRequest):
+    if not req.rows:
+        raise HTTPException(status_code=422, detail="rows must not be empty")
+    return ingest(pd.DataFrame([row.model_dump() for row in req.rows]))
+
+
+@app.post("/recommend", response_model=List[SourceScore])
+def recommend(req: RecommendRequest):
+    check_weights(req)
+
+    if req.sources is None:
+        rows = reference_predictions(req.department, req.job_title, req.scaling)
+    else:
+        if not req.sources:
+            raise HTTPException(status_code=422, detail="sources must not be empty")
+        check_labels([(req.department, req.job_title, src) for src in req.sources])
+        source_data = {src: stats.model_dump() for src, stats in req.sources.items()}
+        rows = cached_predictions(req.department, req.job_title, source_data, scaling=req.scaling)
+    scores = rows.assign(optimal_score=rank(rows, req.time_w, req.cost_w, req.oar_w))
+
+    return scores.sort_values(by="optimal_score", ascending=False).to_dict("records")
+
+
+# Winner regions over the weight simplex for one department/job, from the
+# reference predictions and one matrix product.
+@app.post("/sensitivity", response_model=SensitivityMap)
+def sensitivity(req: SensitivityRequest):
+    try:
+        grid_divisions(req.step)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    rows = reference_predictions(req.department, req.job_title)
+    grid, winner, margin = winner_map(rows[SCALED_COLUMNS].to_numpy(), req.step)
+    sources = rows["source"].tolist()
+    best = [sources[i] for i in winner]
+    return {
+        "step": req.step,
+        "sources": sources,
+        "shares": {src: best.count(src) / len(best) for src in sources},
+        "weights": grid.round(6).tolist(),
+        "best_source": best,
+        "margin": margin.tolist(),
+    }
+
+
+@app.post("/score", response_model=RowScore)
+async def score(req: ScoreRequest):
+    check_weights(req)
+    check_labels([(req.department, req.job_title, req.source)])
+    return await batcher.submit(req)
+
+
+@app.post("/score/batch", response_model=List[RowScore])
+def score_batch(req: BatchScoreRequest):
+    check_weights(req)
+    check_labels([(row.department, row.job_title, row.source) for row in req.rows])
+    if not req.rows:
+        return []
+    df = pd.DataFrame([row.model_dump() for row in req.rows])
+    scored = score_frame(df[ROW_COLUMNS], req.time_w, req.cost_w, req.oar_w)
+    return scored[OUTPUT_COLUMNS].to_dict("records")
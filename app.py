@@ -3,6 +3,16 @@ import pandas as pd
 
 st.set_page_config(page_title="Recruitment Dashboard", layout="wide")
 
+# STARTUP: the views import no ML libraries; in "eager" mode the model is
+# loaded in the background while the first page renders (engine/warmup.py)
+from engine.warmup import STARTUP_MODE, start_background
+if STARTUP_MODE == "eager":
+    start_background()
+
+# Periodic stage timings log when STAGE_TIMINGS_LOG is set (engine/metrics.py)
+from engine.metrics import start_json_log
+start_json_log()
+
 # ======================
 #       CUSTOM CSS
 # ======================
@@ -59,16 +69,28 @@ st.markdown("""
 
 st.markdown("<div class='title-clean'>DATA ALCHEMIST</div>", unsafe_allow_html=True)
 
-tab1, tab2, tab3 = st.tabs(["🏠 Dashboard", "📊 Predict Optimal Score", "📊 Predict New Dataset"])
+tab1, tab2, tab3, tab4 = st.tabs(["🏠 Dashboard", "📊 Predict Optimal Score", "📊 Predict New Dataset", "🧭 Weight Sensitivity"])
 
+# Every view runs as a fragment: a widget inside one tab reruns only that
+# tab's view, not the other tabs (which keep their last output and state).
 with tab1:
     from views import dashboard
-    dashboard.run()
+    st.fragment(dashboard.run)()
 
 with tab2:
     from views import predictpage
-    predictpage.run()
+    st.fragment(predictpage.run)()
 
 with tab3:
     from views import predictup
-    predictup.run()
\ No newline at end of file
+    st.fragment(predictup.run)()
+
+with tab4:
+    from views import sensitivity
+    st.fragment(sensitivity.run)()
+
+# STAGE TIMINGS PANEL (STAGE_TIMINGS=1, see engine/metrics.py)
+from engine.metrics import is_enabled
+if is_enabled():
+    from views import debug
+    st.fragment(debug.run)()
\ No newline at end of file
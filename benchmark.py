@@ -0,0 +1,273 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Peak RSS comes from getrusage, which Windows does not have
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Latency / throughput benchmark for the scoring pipeline (no Streamlit).
+#   python benchmark.py                      run every case, compare to the baseline
+#   python benchmark.py --save               run and store the results as the new baseline
+#   python benchmark.py single_source rows   run only cases whose name starts with these
+# Every case runs in its own process (model loaded and warmed up before
+# timing), so the peak RSS reported is that case's alone.
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = "benchmark_baseline.json"
+
+DEPT, JOB = "Engineering", "Software Engineer"
+WEIGHTS = (0.4, 0.4, 0.2)
+UPLOAD_ROWS = 10_000
+WORKERS_ROWS = 100_000
+
+
+# SYNTHETIC DATA
+# Rows drawn from the reference CSV's own distributions: (department,
+# job_title) pairs and sources by their frequency, every numeric column
+# resampled independently.
+def synthetic_dataset(n, seed=0):
+    from engine.data import DATA_PATH, read_columns
+
+    real = read_columns(path=DATA_PATH)
+    rng = np.random.default_rng(seed)
+    pairs = real[["department", "job_title"]].astype(str).to_numpy()[rng.integers(0, len(real), n)]
+    df = pd.DataFrame({
+        "recruitment_id": np.arange(1, n + 1),
+        "department": pairs[:, 0],
+        "job_title": pairs[:, 1],
+    })
+    for col in ["num_applicants", "time_to_hire_days", "cost_per_hire", "source", "offer_acceptance_rate"]:
+        values = real[col].to_numpy()
+        df[col] = np.asarray(values)[rng.integers(0, len(values), n)]
+        if col == "source":
+            df[col] = df[col].astype(str)
+    return df[list(real.columns)]
+
+
+# CASES
+# Each returns (fn, rows per call, timed repeats); fn is what gets timed.
+def case_single_source():
+    from engine.data import source_stats
+    from engine.scoring import score_sources
+
+    data = {"Referral": source_stats()["Referral"]}
+    return (lambda: score_sources(DEPT, JOB, data, *WEIGHTS)), 1, 500
+
+
+# Optimal Score page PREDICT: table lookup + weighted ranking of 4 sources
+def case_predict_page():
+    from engine.recommendations import lookup, rank
+
+    return (lambda: rank(lookup(DEPT, JOB), *WEIGHTS)), 4, 500
+
+
+# The same 4 sources scored through the model (what the table precomputes)
+def case_predict_sources():
+    from engine.data import source_stats
+    from engine.scoring import score_sources
+
+    data = source_stats()
+    return (lambda: score_sources(DEPT, JOB, data, *WEIGHTS)), 4, 500
+
+
+# Predict New Dataset page: stream the uploaded CSV into per-source stats,
+# then score the sources with relative scaling
+def case_upload():
+    from engine.scoring import score_sources
+    from engine.streaming import aggregate_upload
+
+    data = synthetic_dataset(UPLOAD_ROWS).drop(columns=["recruitment_id", "department", "job_title", "num_applicants"])
+    payload = data.to_csv(index=False).encode()
+
+    def run():
+        source_data = aggregate_upload(io.BytesIO(payload))
+        return score_sources(DEPT, JOB, source_data, *WEIGHTS, scaling="relative", time_floor=0.0001)
+    return run, UPLOAD_ROWS, 20
+
+
+# Row-level scoring (SCORE ALL ROWS / score_cli.py), chunk by chunk
+def case_rows(n):
+    from engine.batch import CHUNK_SIZE, score_frame
+
+    df = synthetic_dataset(n)
+
+    def run():
+        for start in range(0, n, CHUNK_SIZE):
+            score_frame(df.iloc[start:start + CHUNK_SIZE], *WEIGHTS)
+    return run, n, max(3, 1_000_000 // n)
+
+
+# score_cli.py --workers, one worker per CPU, end to end (each worker loads
+# its model, so this includes startup). It runs the CLI as a subprocess: case
+# processes are pool workers, which cannot start pools of their own. On one
+# CPU the workers run one after another, so the result says nothing about
+# parallel speedup; the result records the worker count and report() only
+# compares it with a baseline that used the same count.
+def case_workers():
+    workers = os.cpu_count() or 1
+    folder = tempfile.mkdtemp(prefix="benchmark-")
+    source = os.path.join(folder, "requisitions.csv")
+    synthetic_dataset(WORKERS_ROWS).to_csv(source, index=False)
+    command = [sys.executable, os.path.join(APP_DIR, "score_cli.py"), source, "-o", os.path.join(folder, "ranked.csv"), "--workers", str(workers)]
+
+    def run():
+        subprocess.run(command, check=True, capture_output=True)
+    run.workers = workers
+    run.cleanup = lambda: shutil.rmtree(folder, ignore_errors=True)
+    return run, WORKERS_ROWS, 3
+
+
+def cases(sizes):
+    named = {
+        "single_source": case_single_source,
+        "predict_page": case_predict_page,
+        "predict_sources": case_predict_sources,
+        "upload": case_upload,
+        "score_cli_workers": case_workers,
+    }
+    for n in sizes:
+        named[f"rows_{n}"] = lambda n=n: case_rows(n)
+    return named
+
+
+# RUNNER
+def run_case(name, sizes, repeat_scale):
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+    from engine.warmup import warm_up
+
+    warm_up()
+    fn, rows, repeats = cases(sizes)[name]()
+    repeats = max(1, int(repeats * repeat_scale))
+    for _ in range(min(3, repeats)):
+        fn()
+
+    samples = []
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    finally:
+        if hasattr(fn, "cleanup"):
+            fn.cleanup()
+
+    p50, p99 = np.percentile(samples, [50, 99])
+    result = {
+        "rows": rows,
+        "repeats": repeats,
+        "p50_ms": p50 * 1000,
+        "p99_ms": p99 * 1000,
+        "rows_per_s": rows / p50,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if hasattr(fn, "workers"):
+        result["workers"] = fn.workers
+    return result
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def environment():
+    import xgboost
+
+    from engine.models import INFERENCE_BACKEND
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "xgboost": xgboost.__version__,
+        "cpus": os.cpu_count(),
+        "backend": INFERENCE_BACKEND,
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+# REPORT
+def report(results, baseline, threshold):
+    regressions = []
+    print(f"{'case':<18}{'rows':>9}{'p50 ms':>11}{'p99 ms':>11}{'rows/s':>13}{'peak MB':>9}  vs baseline p50")
+    for name, r in results.items():
+        peak = "-" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.0f}"
+        line = f"{name:<18}{r['rows']:>9,}{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['rows_per_s']:>13,.0f}{peak:>9}"
+        base = baseline.get(name)
+        if base and base.get("workers") != r.get("workers"):
+            line += f"  n/a (baseline ran {base.get('workers')} workers)"
+        elif base:
+            change = r["p50_ms"] / base["p50_ms"] - 1
+            line += f"  {change:+.1%}"
+            if change > threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        if r.get("workers") == 1:
+            line += "  (1 CPU: no parallel speedup measured)"
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scoring pipeline.")
+    parser.add_argument("cases", nargs="*", help="run only cases whose name starts with one of these")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="row-level dataset sizes (default 10k,100k,1M)")
+    parser.add_argument("--repeat-scale", type=float, default=1.0, help="multiply every case's repeat count")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help=f"baseline file (default {BASELINE_PATH})")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown reported as a regression (default 0.10)")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 when a case regressed")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    names = [name for name in cases(sizes) if not args.cases or any(name.startswith(c) for c in args.cases)]
+    if not names:
+        parser.error("no case matches")
+
+    baseline_path = os.path.join(APP_DIR, args.baseline)
+    try:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {"cases": {}}
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(run_case, (name, sizes, args.repeat_scale))
+        print(f"{name} done", file=sys.stderr)
+
+    regressions = report(results, baseline["cases"], args.threshold)
+
+    if args.save:
+        os.chdir(APP_DIR)
+        sys.path.insert(0, APP_DIR)
+        baseline = {"environment": environment(), "cases": {**baseline["cases"], **results}}
+        with open(baseline_path, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"baseline saved to {baseline_path}", file=sys.stderr)
+
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import re
+
+import numpy as np
+
+# SUMMARY SPECS
+# name -> (column, statistic), the same shape as pandas named aggregation,
+# evaluated by SourceAccumulator (engine/streaming.py) for the reference
+# dataset and uploads alike.
+# Model input for the Optimal Score page (reference dataset) ...
+REFERENCE_SUMMARY = {
+    "a": ("num_applicants", "median"),
+    "t": ("time_to_hire_days", "median"),
+    "c": ("cost_per_hire", "median"),
+    "o": ("offer_acceptance_rate", "mean"),
+}
+
+# ... and for the Predict New Dataset page (uploads have no num_applicants,
+# the number of rows per source is used instead).
+UPLOAD_SUMMARY = {
+    "a": ("source", "size"),
+    "t": ("time_to_hire_days", "median"),
+    "c": ("cost_per_hire", "median"),
+    "o": ("offer_acceptance_rate", "mean"),
+}
+
+MOMENT_STATS = {"size", "count", "sum", "mean", "min", "max"}
+TRIM_PROPORTION = 0.1
+
+
+# STATISTICS
+# "size", "count", "sum", "mean", "min", "max" are running statistics.
+# "median", "pNN" (e.g. "p25", "p75", "p99.5") and "trimmed_mean" /
+# "trimmed_mean_NN" (NN% cut from each tail, default 10%) are order statistics.
+def parse_stat(stat):
+    if stat in MOMENT_STATS:
+        return stat, None
+    if stat == "median":
+        return "quantile", 0.5
+    if stat == "trimmed_mean":
+        return "trimmed_mean", TRIM_PROPORTION
+
+    match = re.fullmatch(r"p(\d+(?:\.\d+)?)", stat)
+    if match and float(match.group(1)) <= 100:
+        return "quantile", float(match.group(1)) / 100
+
+    match = re.fullmatch(r"trimmed_mean_(\d+(?:\.\d+)?)", stat)
+    if match and float(match.group(1)) < 50:
+        return "trimmed_mean", float(match.group(1)) / 100
+
+    raise ValueError(f"Unknown statistic: {stat}")
+
+
+def sorted_quantile(values, q):
+    n = len(values)
+    if n == 0:
+        return np.nan
+    pos = (n - 1) * q
+    lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+    if q == 0.5:
+        return (values[lo] + values[hi]) / 2
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def sorted_trimmed_mean(values, proportion):
+    n = len(values)
+    cut = int(proportion * n)
+    if n - 2 * cut <= 0:
+        return np.nan
+    return values[cut:n - cut].mean()
@@ -0,0 +1,155 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from engine.data import DATA_PATH, source_stats
+from engine.models import MODEL_PATH, get_model
+from engine.scoring import PRED_COLUMNS, SCALED_COLUMNS, predict_targets, scale_predictions, optimal_score
+
+ROW_COLUMNS = [
+    "department", "job_title", "source",
+    "num_applicants", "time_to_hire_days", "cost_per_hire", "offer_acceptance_rate",
+]
+STAT_COLUMNS = ROW_COLUMNS[3:]
+OUTPUT_COLUMNS = PRED_COLUMNS + SCALED_COLUMNS + ["optimal_score"]
+CHUNK_SIZE = 100_000
+
+# Scored files live in their own temp directory and are removed once older
+# than SCORED_MAX_AGE seconds, so files of ended sessions do not pile up.
+# Files above DOWNLOAD_MAX_BYTES are not offered as browser downloads (the
+# whole file would be held in the server's memory).
+SCORED_DIR = os.path.join(tempfile.gettempdir(), "recruitment_scored")
+SCORED_MAX_AGE = int(os.environ.get("SCORED_MAX_AGE", "3600"))
+DOWNLOAD_MAX_BYTES = int(os.environ.get("DOWNLOAD_MAX_MB", "200")) * 1024 ** 2
+
+
+# ROW-LEVEL SCORING
+# Every row is scored with its own department/job/source and stats. Scores
+# use the pipeline's scaler_optimal (like the Optimal Score page), so a row's
+# score does not depend on the rest of the file and chunks can be scored
+# independently. Weights may be per-row arrays.
+def score_frame(df, time_w, cost_w, oar_w, model_path=MODEL_PATH):
+    model = get_model(model_path)
+
+    X = model.features.build(
+        df["department"].to_numpy(), df["job_title"].to_numpy(), df["source"].to_numpy(),
+        df["num_applicants"].to_numpy(), df["time_to_hire_days"].to_numpy(),
+        df["cost_per_hire"].to_numpy(), df["offer_acceptance_rate"].to_numpy(),
+        time_floor=0.0001,
+    )
+    preds = np.column_stack(predict_targets(model.predictor(), X))
+    scaled = scale_predictions(model.pipeline, preds)
+
+    out = df.copy()
+    out[PRED_COLUMNS] = preds
+    out[SCALED_COLUMNS] = scaled
+    out["optimal_score"] = optimal_score(scaled, time_w, cost_w, oar_w)
+    return out
+
+
+def iter_scored_chunks(file, time_w, cost_w, oar_w, chunksize=CHUNK_SIZE, progress=None, total_bytes=None, model_path=MODEL_PATH):
+    reader = pd.read_csv(file, chunksize=chunksize, dtype={"department": "object", "job_title": "object", "source": "object"})
+    for chunk in reader:
+        yield score_frame(chunk, time_w, cost_w, oar_w, model_path)
+        if progress is not None and total_bytes:
+            progress(min(file.tell() / total_bytes, 1.0))
+
+
+# SOURCE RANKING
+# For every requisition, scores each source the model knows and ranks them
+# (rank_1_source/rank_1_score, rank_2_source/...). When the row carries its
+# own stats (STAT_COLUMNS) every candidate source is scored with them;
+# otherwise each source gets the per-source medians of the reference dataset,
+# exactly like the Optimal Score page, and only the department/job matters.
+def rank_frame(df, time_w, cost_w, oar_w, model_path=MODEL_PATH, data_path=DATA_PATH):
+    model = get_model(model_path)
+    sources = model.features.labels("source_")
+    k = len(sources)
+
+    if set(STAT_COLUMNS).issubset(df.columns):
+        keys = df
+        stats = [np.repeat(df[col].to_numpy(dtype=np.float64), k) for col in STAT_COLUMNS]
+        time_floor = 0.0001
+    else:
+        keys = df[["department", "job_title"]].drop_duplicates()
+        reference = source_stats(data_path)
+        stats = [np.tile([reference[src][key] for src in sources], len(keys)) for key in ("a", "t", "c", "o")]
+        time_floor = None
+
+    X = model.features.build(
+        np.repeat(keys["department"].to_numpy(), k),
+        np.repeat(keys["job_title"].to_numpy(), k),
+        np.tile(np.asarray(sources, dtype=object), len(keys)),
+        *stats,
+        time_floor=time_floor,
+    )
+    preds = np.column_stack(predict_targets(model.predictor(), X))
+    scores = optimal_score(scale_predictions(model.pipeline, preds), time_w, cost_w, oar_w).reshape(-1, k)
+
+    order = np.argsort(-scores, axis=1, kind="stable")
+    names = np.asarray(sources, dtype=object)
+    ranked = pd.DataFrame(index=keys.index)
+    for r in range(k):
+        ranked[f"rank_{r + 1}_source"] = names[order[:, r]]
+        ranked[f"rank_{r + 1}_score"] = np.take_along_axis(scores, order[:, r:r + 1], axis=1)[:, 0]
+
+    if keys is df:
+        return pd.concat([df, ranked], axis=1)
+    ranked = pd.concat([keys, ranked], axis=1)
+    return df.merge(ranked, on=["department", "job_title"], how="left").set_index(df.index)
+
+
+# Appends chunks to a CSV/Parquet file as they arrive, so memory stays
+# bounded by the chunk size. Returns the number of rows written.
+def write_chunks(chunks, path, fmt="csv"):
+    writer = None
+    rows = 0
+    try:
+        for i, chunk in enumerate(chunks):
+            if fmt == "parquet":
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def sweep_scored_files(max_age=SCORED_MAX_AGE):
+    now = time.time()
+    try:
+        names = os.listdir(SCORED_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(SCORED_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Scored chunks go to a temporary CSV/Parquet file. Returns the file path.
+def score_to_file(file, time_w, cost_w, oar_w, fmt="csv", chunksize=CHUNK_SIZE, progress=None, total_bytes=None, model_path=MODEL_PATH):
+    sweep_scored_files()
+    os.makedirs(SCORED_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", prefix="scored_", dir=SCORED_DIR)
+    os.close(fd)
+
+    try:
+        write_chunks(iter_scored_chunks(file, time_w, cost_w, oar_w, chunksize, progress, total_bytes, model_path), path, fmt)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
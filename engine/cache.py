@@ -0,0 +1,92 @@
+import os
+import threading
+from collections import OrderedDict
+
+from engine.data import DATA_PATH, source_stats
+from engine.models import MODEL_PATH, model_version
+from engine.recommendations import lookup
+from engine.scoring import predict_sources, stats_hash
+
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "1024"))
+
+
+# LRU CACHE
+# Bounded, thread-safe, with hit/miss counters. `compute` runs outside the
+# lock, so a slow miss does not block hits; two sessions missing the same key
+# at once both compute it and the second result is kept.
+class LRUCache:
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def prometheus(self, name):
+        stats = self.stats()
+        return "".join(
+            f"# TYPE {name}_{field} {kind}\n{name}_{field} {stats[field]}\n"
+            for field, kind in (("hits", "counter"), ("misses", "counter"), ("size", "gauge"))
+        )
+
+
+# PREDICTION CACHE
+# Shared by every session and both prediction pages. Keyed on the inputs the
+# predictions depend on: department, job, a hash of the per-source stats,
+# scaling, and the model file and version. A new dataset (other stats) or a
+# replaced pickle (other version) therefore misses, and the stale entries
+# age out. Weights are not part of the key: callers apply them with
+# optimal_score(). The returned frames are shared, callers must not modify them.
+predictions = LRUCache(PREDICTION_CACHE_SIZE)
+
+
+# `source_data` None means the reference per-source stats (Optimal Score
+# page), served from the recommendation table; department/job pairs outside
+# the table (DEPARTMENT_JOBS) go through the model. Callers check the labels.
+def cached_predictions(dept, job, source_data=None, scaling="model", time_floor=None,
+                       model_path=MODEL_PATH, data_path=DATA_PATH):
+    reference = source_data is None
+    if reference:
+        source_data = source_stats(data_path)
+    key = (dept, job, stats_hash(source_data), scaling, time_floor, model_path, model_version(model_path))
+
+    def compute():
+        if reference and scaling == "model" and time_floor is None:
+            rows = lookup(dept, job, model_path=model_path, data_path=data_path)
+            if not rows.empty:
+                return rows.drop(columns=["department", "job_title"]).reset_index(drop=True)
+        return predict_sources(dept, job, source_data, scaling, time_floor, model_path)
+    return predictions.get_or_compute(key, compute)
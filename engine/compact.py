@@ -0,0 +1,205 @@
+import hashlib
+import io
+import json
+import os
+import sys
+
+import numpy as np
+
+from engine.fused import FUSED_FILE_KEY, fused_model
+from engine.inference import FLAT_FOREST_KEY, FlatForest
+
+FORMAT = 2
+STORE_DIR = "compact"
+OBJECTS_DIR = "objects"
+
+
+# COMPACT ARTIFACTS
+# The same pipeline as models/<version>.pkl without any pickled sklearn /
+# XGBoost object, in a content-addressed store generated at build time
+# (python -m engine.compact, not committed):
+#   models/compact/<version>.json     source pickle sha256, component hashes,
+#                                     scaler settings, and the object of each entry
+#   models/compact/objects/<sha256>.npy  scaler statistics, KMeans centroids,
+#                                     column lists, and the fused model exported
+#                                     as FlatForest node arrays
+#   models/compact/objects/<sha256>.ubj  the fused booster in XGBoost's UBJSON format
+# Each object is named after its content, so versions that share an entry
+# point to one file: pipeline_final and pipeline_final_1 share every entry
+# but three column lists only pipeline_final has. The .npy files are
+# memory-mapped read-only, so loading reads next to nothing and every process
+# serving any of these versions shares the same pages of the OS page cache.
+# Only NumPy is needed to serve it: XGBoost is imported, and the booster
+# loaded, at the first batch too large for the FlatForest.
+def compact_path(pickle_path):
+    models_dir, name = os.path.split(pickle_path)
+    return os.path.join(models_dir, STORE_DIR, os.path.splitext(name)[0] + ".json")
+
+
+def _objects_dir(path):
+    return os.path.join(os.path.dirname(path), OBJECTS_DIR)
+
+
+# What FeatureBuilder and scale_predictions read from the sklearn objects.
+# The scaler's mean / scale are stored as applied (zeros / ones when
+# with_mean / with_std is off).
+class StandardScalerArrays:
+
+    with_mean = True
+    with_std = True
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+
+class MinMaxScalerArrays:
+
+    def __init__(self, scale, min_, clip, feature_range):
+        self.scale_ = scale
+        self.min_ = min_
+        self.clip = clip
+        self.feature_range = tuple(feature_range)
+
+
+class KMeansArrays:
+
+    def __init__(self, cluster_centers):
+        self.cluster_centers_ = cluster_centers
+
+
+# EXPORT
+# Objects are written to a temporary file and renamed into place, and never
+# modified afterwards; the version file is replaced last. Processes still
+# mapping the previous export keep reading its files.
+def _put(objects_dir, data, suffix):
+    name = hashlib.sha256(data).hexdigest() + suffix
+    path = os.path.join(objects_dir, name)
+    if not os.path.exists(path):
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return name
+
+
+def _npy_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def export(pipeline, path, source_sha256, components):
+    fused = fused_model(pipeline)
+    if fused is None:
+        raise ValueError("Compact artifacts need regressors that can be fused (see engine/fused.py)")
+    forest = FlatForest(fused)
+
+    scaler_cluster = pipeline["scaler_cluster"]
+    n_cluster_features = len(scaler_cluster.scale_ if scaler_cluster.with_std else scaler_cluster.mean_)
+    scaler_optimal = pipeline["scaler_optimal"]
+    arrays = {
+        "scaler_cluster.mean": scaler_cluster.mean_ if scaler_cluster.with_mean else np.zeros(n_cluster_features),
+        "scaler_cluster.scale": scaler_cluster.scale_ if scaler_cluster.with_std else np.ones(n_cluster_features),
+        "scaler_optimal.scale": scaler_optimal.scale_,
+        "scaler_optimal.min": scaler_optimal.min_,
+        "kmeans.cluster_centers": pipeline["kmeans"].cluster_centers_,
+    }
+    columns = [key for key, value in pipeline.items() if isinstance(value, list)]
+    for key in columns:
+        arrays[key] = np.asarray(pipeline[key], dtype=str)
+    for name in FlatForest.ARRAYS:
+        arrays[f"flat_forest.{name}"] = getattr(forest, name)
+
+    objects_dir = _objects_dir(path)
+    os.makedirs(objects_dir, exist_ok=True)
+    meta = {
+        "format": FORMAT,
+        "source_sha256": source_sha256,
+        "components": components,
+        "columns": columns,
+        "scaler_optimal": {"clip": bool(scaler_optimal.clip), "feature_range": list(scaler_optimal.feature_range)},
+        "flat_forest": {"depth": forest.depth, "n_targets": forest.n_targets},
+        "arrays": {name: _put(objects_dir, _npy_bytes(array), ".npy") for name, array in arrays.items()},
+        "booster": _put(objects_dir, bytes(fused.save_raw("ubj")), ".ubj"),
+    }
+
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+# Removes the objects no version file of the store refers to
+def prune(store_dir):
+    objects_dir = os.path.join(store_dir, OBJECTS_DIR)
+    used = set()
+    for name in os.listdir(store_dir):
+        if name.endswith(".json"):
+            meta = read_meta(os.path.join(store_dir, name))
+            if meta is not None:
+                used.update(meta["arrays"].values())
+                used.add(meta["booster"])
+    removed = [name for name in os.listdir(objects_dir) if name not in used]
+    for name in removed:
+        os.remove(os.path.join(objects_dir, name))
+    return removed
+
+
+# LOAD
+def read_meta(path):
+    try:
+        with open(path) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    return meta if meta.get("format") == FORMAT else None
+
+
+def load(path):
+    meta = read_meta(path)
+    if meta is None:
+        raise ValueError(f"Not a compact model artifact: {path}")
+    objects_dir = _objects_dir(path)
+
+    def array(name):
+        return np.asarray(np.load(os.path.join(objects_dir, meta["arrays"][name]), mmap_mode="r", allow_pickle=False))
+
+    scaler_optimal = meta["scaler_optimal"]
+    pipeline = {
+        "scaler_cluster": StandardScalerArrays(array("scaler_cluster.mean"), array("scaler_cluster.scale")),
+        "scaler_optimal": MinMaxScalerArrays(
+            array("scaler_optimal.scale"), array("scaler_optimal.min"), scaler_optimal["clip"], scaler_optimal["feature_range"],
+        ),
+        "kmeans": KMeansArrays(array("kmeans.cluster_centers")),
+        FLAT_FOREST_KEY: FlatForest.from_arrays(
+            {name: array(f"flat_forest.{name}") for name in FlatForest.ARRAYS}, **meta["flat_forest"],
+        ),
+        FUSED_FILE_KEY: os.path.join(objects_dir, meta["booster"]),
+    }
+    for key in meta["columns"]:
+        pipeline[key] = array(key)
+    return pipeline, meta
+
+
+# python -m engine.compact              export every servable version of the manifest
+# python -m engine.compact V [V ...]    export these versions
+# Run at build / deploy time, and again after replacing a pickle.
+if __name__ == "__main__":
+    import joblib
+
+    from engine.registry import MANIFEST_PATH, MODELS_DIR, component_hash, file_sha256, read_manifest, version_path
+
+    manifest = read_manifest()
+    if manifest is None:
+        sys.exit(f"No {MANIFEST_PATH}, run python -m engine.registry first")
+    versions = sys.argv[1:] or [v for v, artifact in manifest["artifacts"].items() if artifact["servable"]]
+    for version in versions:
+        path = version_path(version)
+        pipeline = joblib.load(path)
+        components = {key: component_hash(value) for key, value in pipeline.items()}
+        print(export(pipeline, compact_path(path), file_sha256(path), components))
+    removed = prune(os.path.join(MODELS_DIR, STORE_DIR))
+    if removed:
+        print(f"removed {len(removed)} unused objects")
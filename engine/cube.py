@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from engine.data import DATA_PATH, METRICS, memo, read_columns
+
+DIMENSIONS = ["department", "job_title", "source", "applicant_band"]
+
+APPLICANT_BAND_EDGES = [0, 50, 100, 150, 200, 250, np.inf]
+APPLICANT_BANDS = ["<50", "50-99", "100-149", "150-199", "200-249", "250+"]
+
+
+def applicant_band(num_applicants):
+    return pd.cut(num_applicants, bins=APPLICANT_BAND_EDGES, labels=APPLICANT_BANDS, right=False)
+
+
+# AGGREGATE CUBE
+# One groupby over every dimension (the dashboard's source x department
+# groupby, extended to job_title and applicant bands), keeping count, sum and
+# sum of squares per metric for each cell. Means and variances of any slice
+# roll up from these few hundred cells, so filters and drill-downs cost the
+# same whatever the number of rows.
+def build_cube(df):
+    df = df.assign(applicant_band=applicant_band(df["num_applicants"]))
+    squares = df[METRICS].pow(2)
+    squares.columns = [f"{m}_sumsq" for m in METRICS]
+    grouped = pd.concat([df[DIMENSIONS + METRICS], squares], axis=1).groupby(DIMENSIONS, observed=True)
+
+    counts = grouped[METRICS].count()
+    counts.columns = [f"{m}_count" for m in METRICS]
+    sums = grouped[METRICS].sum()
+    sums.columns = [f"{m}_sum" for m in METRICS]
+
+    cube = pd.concat([grouped.size().rename("rows"), counts, sums, grouped[list(squares.columns)].sum()], axis=1)
+    return cube.reset_index()
+
+
+# Adds the cells of `other` into `cells` (appended rows, engine/ingest.py).
+def merge_cubes(cells, other):
+    merged = pd.concat([cells, other], ignore_index=True)
+    for dim in DIMENSIONS:
+        if not isinstance(merged[dim].dtype, pd.CategoricalDtype):
+            merged[dim] = merged[dim].astype("category")
+    return merged.groupby(DIMENSIONS, observed=True).sum().reset_index()
+
+
+def cube(path=DATA_PATH):
+    return memo("cube", path, lambda: build_cube(
+        read_columns(["department", "job_title", "source", "num_applicants"] + METRICS, path=path)
+    ), lambda cells, delta: merge_cubes(cells, build_cube(delta)))
+
+
+# SLICE AND ROLL UP
+# `filters` maps a dimension to the values to keep (empty = all). Returns one
+# row per `by` group with the row count and, per metric, its mean, standard
+# deviation (sample) and count.
+def rollup(cells, by=(), filters=None):
+    for dim, values in (filters or {}).items():
+        if values:
+            cells = cells[cells[dim].isin(values)]
+
+    value_columns = ["rows"] + [f"{m}_{part}" for m in METRICS for part in ("count", "sum", "sumsq")]
+    if by:
+        totals = cells.groupby(list(by), observed=True)[value_columns].sum().reset_index()
+    else:
+        totals = cells[value_columns].sum().to_frame().T
+
+    out = totals[list(by)].copy()
+    for dim in by:
+        if isinstance(out[dim].dtype, pd.CategoricalDtype):
+            out[dim] = out[dim].cat.remove_unused_categories()
+    out["rows"] = totals["rows"].astype("int64")
+    for m in METRICS:
+        n = totals[f"{m}_count"]
+        mean = totals[f"{m}_sum"] / n
+        var = (totals[f"{m}_sumsq"] - n * mean ** 2) / (n - 1)
+        out[m] = mean
+        out[f"{m}_std"] = np.sqrt(var.clip(lower=0)).where(n > 1)
+        out[f"{m}_count"] = n
+    return out
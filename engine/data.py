@@ -0,0 +1,147 @@
+import os
+import threading
+
+import numpy as np
+
+from engine.aggregation import REFERENCE_SUMMARY
+from engine.storage import appended_rows, read_parquet
+from engine.streaming import SourceAccumulator
+
+DATA_PATH = "recruitment_efficiency_improved.csv"
+
+DTYPES = {
+    "recruitment_id": "int64",
+    "department": "category",
+    "job_title": "category",
+    "num_applicants": "int32",
+    "time_to_hire_days": "int32",
+    "cost_per_hire": "float64",
+    "source": "category",
+    "offer_acceptance_rate": "float64",
+}
+
+METRICS = ["offer_acceptance_rate", "time_to_hire_days", "cost_per_hire"]
+
+
+# DATA VERSION
+# (mtime, size) of the file. Every cached value below is keyed on it, so
+# replacing the CSV invalidates the dataset and all aggregates at once.
+def dataset_version(path=DATA_PATH):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# PROCESS-WIDE MEMO
+# Shared by every Streamlit session in this process. Also used by the views
+# for values derived from these aggregates (e.g. the dashboard figures).
+# A value registered with `update(old, delta)` is carried over to the next
+# dataset version when rows are appended: by the ingesting process itself
+# (see apply_delta), and by every other process from the appended Parquet
+# files alone (engine/storage.py appended_rows). The others are dropped and
+# recomputed on next use.
+_lock = threading.RLock()
+_cache = {}
+_updaters = {}
+_deltas = {}
+
+
+# New rows between two versions, read once for all the values updated
+def _delta(path, old_version, new_version):
+    key = (path, old_version, new_version)
+    if key not in _deltas:
+        _deltas.clear()
+        _deltas[key] = appended_rows(path, old_version, new_version, dtypes=DTYPES)
+    return _deltas[key]
+
+
+def memo(name, path, compute, update=None):
+    if update is not None:
+        _updaters[name] = update
+    key = (name, path, dataset_version(path))
+    value = _cache.get(key)
+    if value is None:
+        with _lock:
+            value = _cache.get(key)
+            if value is None:
+                previous = [k for k in _cache if k[:2] == key[:2]]
+                delta = _delta(path, previous[0][2], key[2]) if previous and update is not None else None
+                value = compute() if delta is None else update(_cache[previous[0]], delta)
+                for old in previous:
+                    del _cache[old]
+                _cache[key] = value
+    return value
+
+
+# Called by engine/ingest.py after `delta` (new rows) was appended to `path`,
+# moving the file from `old_version` to `new_version`.
+def apply_delta(path, old_version, new_version, delta):
+    with _lock:
+        for key in [k for k in _cache if k[1] == path]:
+            value = _cache.pop(key)
+            name, _, version = key
+            if version == old_version and name in _updaters:
+                _cache[(name, path, new_version)] = _updaters[name](value, delta)
+
+
+# DATASET
+# Reads go through the Parquet copy of the CSV (see engine/storage.py), so
+# callers only pay for the columns they ask for.
+def read_columns(columns=None, path=DATA_PATH):
+    return read_parquet(path, columns=columns, dtypes=DTYPES)
+
+
+# DASHBOARD AGGREGATES
+def kpis(path=DATA_PATH):
+    def compute():
+        df = read_columns(["recruitment_id", "time_to_hire_days", "cost_per_hire", "offer_acceptance_rate"], path=path)
+        return {
+            "avg_cost": df["cost_per_hire"].mean(),
+            "avg_time": df["time_to_hire_days"].mean(),
+            "avg_oar": df["offer_acceptance_rate"].mean(),
+            "sum_cost": df["cost_per_hire"].sum(),
+            "total_applicants": len(df),
+            "recruitment_ids": df["recruitment_id"].nunique(),
+        }
+
+    # Appended recruitment_ids are always new (engine/ingest.py rejects duplicates)
+    def update(kpi, delta):
+        n, m = kpi["total_applicants"], len(delta)
+        return {
+            "avg_cost": (kpi["avg_cost"] * n + delta["cost_per_hire"].sum()) / (n + m),
+            "avg_time": (kpi["avg_time"] * n + delta["time_to_hire_days"].sum()) / (n + m),
+            "avg_oar": (kpi["avg_oar"] * n + delta["offer_acceptance_rate"].sum()) / (n + m),
+            "sum_cost": kpi["sum_cost"] + delta["cost_per_hire"].sum(),
+            "total_applicants": n + m,
+            "recruitment_ids": kpi["recruitment_ids"] + m,
+        }
+    return memo("kpis", path, compute, update)
+
+
+# Sorted array of every recruitment_id in the dataset
+def recruitment_ids(path=DATA_PATH):
+    def compute():
+        return np.unique(read_columns(["recruitment_id"], path=path)["recruitment_id"].to_numpy())
+
+    def update(ids, delta):
+        return np.union1d(ids, delta["recruitment_id"].to_numpy())
+    return memo("recruitment_ids", path, compute, update)
+
+
+# PER-SOURCE STATS used as model input by the Optimal Score page
+# The medians come from per-source quantile sketches (engine/streaming.py),
+# exact up to 200k rows per source, which appended rows are folded into.
+def source_sketches(path=DATA_PATH):
+    def compute():
+        df = read_columns(["source", "num_applicants", "time_to_hire_days", "cost_per_hire", "offer_acceptance_rate"], path=path)
+        return SourceAccumulator(REFERENCE_SUMMARY).update(df)
+
+    def update(accumulator, delta):
+        return accumulator.update(delta)
+    return memo("source_sketches", path, compute, update)
+
+
+def source_stats(path=DATA_PATH):
+    def compute():
+        stats = source_sketches(path).result()
+        return {src: stats[src] for src in sorted(stats)}
+    return memo("source_stats", path, compute)
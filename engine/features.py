@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from engine.metrics import stage
+
+
+# ONE-HOT PREFIXES (same prefixes used by pd.get_dummies in the Stage 2 notebook)
+CATEGORY_PREFIXES = ("department_", "job_title_", "source_")
+
+
+def column_index(columns):
+    return {col: i for i, col in enumerate(columns)}
+
+
+# CLUSTER ASSIGNER
+# kmeans.predict(scaler_cluster.transform(X)) as one matrix product. With
+# z = (x - mean) / scale, the squared distance to centroid c is
+# |z|^2 - 2 z.c + |c|^2; |z|^2 is the same for every centroid, so the nearest
+# one is argmin(x @ W + b) with W = -2 c / scale and b = |c|^2 + 2 (mean / scale).c,
+# both folded once at load time. No DataFrame, no sklearn validation per call.
+class ClusterAssigner:
+
+    def __init__(self, scaler, kmeans):
+        centers = np.asarray(kmeans.cluster_centers_, dtype=np.float64)
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(centers.shape[1])
+        scale = scaler.scale_ if scaler.with_std else np.ones(centers.shape[1])
+
+        self.weights = -2 * (centers / scale).T
+        self.bias = (centers ** 2).sum(axis=1) + 2 * ((mean / scale) * centers).sum(axis=1)
+
+    def predict(self, X_cluster):
+        return np.argmin(X_cluster @ self.weights + self.bias, axis=1).astype(np.int32)
+
+
+# FEATURE BUILDER
+# Builds the model feature matrix for N (dept, job, source, stats) rows at once.
+# Column positions are resolved once per pipeline, so every batch only fills a
+# preallocated NumPy array and runs scaler_cluster / kmeans a single time.
+class FeatureBuilder:
+
+    def __init__(self, pipeline):
+        self.scaler_cluster = pipeline["scaler_cluster"]
+        self.kmeans = pipeline["kmeans"]
+        self.cluster_features_columns = list(pipeline["cluster_features_columns"])
+        self.feature_cols_model = list(pipeline["feature_cols_model"])
+
+        self.cluster_index = column_index(self.cluster_features_columns)
+        self.model_index = column_index(self.feature_cols_model)
+        self.cluster_col = self.model_index.get("cluster")
+        self.cluster_assigner = ClusterAssigner(self.scaler_cluster, self.kmeans)
+
+    def _fill(self, index, n_cols, numeric, categories):
+        n = len(next(iter(numeric.values())))
+        X = np.zeros((n, n_cols), dtype=np.float64)
+
+        for name, values in numeric.items():
+            j = index.get(name)
+            if j is not None:
+                X[:, j] = values
+
+        rows = np.arange(n)
+        for prefix, labels in zip(CATEGORY_PREFIXES, categories):
+            uniques, inverse = np.unique(np.asarray(labels, dtype=object).astype(str), return_inverse=True)
+            slots = np.array([index.get(f"{prefix}{u}", -1) for u in uniques])[inverse]
+            hit = slots >= 0
+            X[rows[hit], slots[hit]] = 1
+
+        return X
+
+    def build(self, depts, jobs, sources, num_applicants, time_to_hire, cost_per_hire, oar, time_floor=None):
+        num_applicants = np.asarray(num_applicants, dtype=np.float64)
+        time_to_hire = np.asarray(time_to_hire, dtype=np.float64)
+        cost_per_hire = np.asarray(cost_per_hire, dtype=np.float64)
+        oar = np.asarray(oar, dtype=np.float64)
+
+        # predictpage: efficiency = 0 when time <= 0, predictup: oar / max(time, floor)
+        if time_floor is None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                efficiency = np.where(time_to_hire > 0, oar / time_to_hire, 0.0)
+        else:
+            efficiency = oar / np.maximum(time_to_hire, time_floor)
+
+        numeric = {
+            "num_applicants": num_applicants,
+            "time_to_hire_days": time_to_hire,
+            "cost_per_hire": cost_per_hire,
+            "offer_acceptance_rate": oar,
+            "efficiency_score": efficiency,
+            "time_cost_interaction": cost_per_hire * time_to_hire,
+        }
+        categories = (depts, jobs, sources)
+
+        with stage("features.cluster"):
+            X_cluster = self._fill(self.cluster_index, len(self.cluster_features_columns), numeric, categories)
+            clusters = self.cluster_assigner.predict(X_cluster)
+
+        with stage("features.encode"):
+            X = self._fill(self.model_index, len(self.feature_cols_model), numeric, categories)
+            if self.cluster_col is not None:
+                X[:, self.cluster_col] = clusters
+        return X
+
+    def build_for_sources(self, dept, job, source_data, time_floor=None):
+        sources = list(source_data.keys())
+        n = len(sources)
+        return self.build(
+            [dept] * n, [job] * n, sources,
+            [source_data[s]["a"] for s in sources],
+            [source_data[s]["t"] for s in sources],
+            [source_data[s]["c"] for s in sources],
+            [source_data[s]["o"] for s in sources],
+            time_floor=time_floor,
+        )
+
+    # Labels the model knows for one category, e.g. labels("source_")
+    def labels(self, prefix):
+        return [col[len(prefix):] for col in self.feature_cols_model if col.startswith(prefix)]
+
+
+# EQUIVALENCE CHECK (python -m engine.features)
+# Compares ClusterAssigner with scaler_cluster + kmeans.predict on every row
+# of the training CSV.
+def check_cluster_assigner(pipeline, data_path):
+    df = pd.read_csv(data_path)
+    builder = FeatureBuilder(pipeline)
+    X = builder.build(
+        df["department"], df["job_title"], df["source"], df["num_applicants"],
+        df["time_to_hire_days"], df["cost_per_hire"], df["offer_acceptance_rate"],
+    )
+    X_cluster = X[:, [builder.model_index[col] for col in builder.cluster_features_columns]]
+    expected = builder.kmeans.predict(
+        builder.scaler_cluster.transform(pd.DataFrame(X_cluster, columns=builder.cluster_features_columns))
+    )
+    return int((builder.cluster_assigner.predict(X_cluster) != expected).sum()), len(df)
+
+
+# Always against the pickle's fitted scaler and KMeans, whatever MODEL_FORMAT
+# says (the compact format keeps only their arrays).
+if __name__ == "__main__":
+    import joblib
+
+    from engine.data import DATA_PATH
+    from engine.models import active_version
+    from engine.registry import version_path
+
+    mismatches, rows = check_cluster_assigner(joblib.load(version_path(active_version())), DATA_PATH)
+    print(f"{mismatches} / {rows} rows assigned to a different cluster")
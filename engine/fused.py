@@ -0,0 +1,115 @@
+import json
+import sys
+
+TARGET_MODELS = ["model_time", "model_cost", "model_oar"]
+FUSED_KEY = "model_fused"
+# Compact artifacts (engine/compact.py) keep the fused model in a file instead
+FUSED_FILE_KEY = "model_fused_file"
+
+
+def _empty_tree(num_feature):
+    # One leaf worth 0.0: pads a shorter model (adding 0.0 is exact)
+    return {
+        "base_weights": [0.0], "categories": [], "categories_nodes": [], "categories_segments": [],
+        "categories_sizes": [], "default_left": [0], "id": 0, "left_children": [-1], "loss_changes": [0.0],
+        "parents": [2147483647], "right_children": [-1], "split_conditions": [0.0], "split_indices": [0],
+        "split_type": [0], "sum_hessian": [0.0],
+        "tree_param": {"num_deleted": "0", "num_feature": str(num_feature), "num_nodes": "1", "size_leaf_vector": "1"},
+    }
+
+
+def _iteration_stop(model, n_trees):
+    # sklearn's predict() stops at best_iteration when early stopping was used
+    try:
+        return model.best_iteration + 1
+    except AttributeError:
+        return n_trees
+
+
+# FUSED MODEL
+# Merges the single-target regressors (time, cost, OAR) into one multi-target
+# XGBoost Booster: the trees are interleaved round by round and tagged with
+# their target in tree_info, and the base scores become one vector. A single
+# inplace_predict then returns the (n, 3) matrix, bit-identical to the three
+# separate predict() calls because every target still sums its own trees in
+# the same order.
+def fuse_models(models):
+    import xgboost as xgb
+
+    learners = [json.loads(model.get_booster().save_raw("json")) for model in models]
+    first = learners[0]["learner"]
+
+    rounds = []
+    for model, learner in zip(models, learners):
+        learner = learner["learner"]
+        params = learner["learner_model_param"]
+        gbm = learner["gradient_booster"]
+        if gbm["name"] != "gbtree" or int(gbm["model"]["gbtree_model_param"]["num_parallel_tree"]) != 1:
+            raise ValueError("Only gbtree models with one tree per round can be fused")
+        if int(params["num_target"]) != 1 or int(params["num_class"]) != 0:
+            raise ValueError("Only single-target regressors can be fused")
+        if learner["objective"]["name"] != first["objective"]["name"]:
+            raise ValueError("All models must share one objective")
+        if learner["feature_names"] != first["feature_names"]:
+            raise ValueError("All models must share one feature layout")
+        trees = gbm["model"]["trees"]
+        rounds.append(trees[:_iteration_stop(model, len(trees))])
+
+    num_feature = int(first["learner_model_param"]["num_feature"])
+    n_rounds = max(len(trees) for trees in rounds)
+    fused_trees, tree_info = [], []
+    for r in range(n_rounds):
+        for target, trees in enumerate(rounds):
+            tree = trees[r] if r < len(trees) else _empty_tree(num_feature)
+            tree["id"] = len(fused_trees)
+            fused_trees.append(tree)
+            tree_info.append(target)
+
+    base_score = "[" + ",".join(lrn["learner"]["learner_model_param"]["base_score"].strip("[]") for lrn in learners) + "]"
+
+    # The first model's JSON (trees already parsed per call) becomes the fused one
+    fused = learners[0]
+    learner = fused["learner"]
+    learner["attributes"] = {}
+    learner["learner_model_param"]["num_target"] = str(len(models))
+    learner["learner_model_param"]["base_score"] = base_score
+    model = learner["gradient_booster"]["model"]
+    model["trees"] = fused_trees
+    model["tree_info"] = tree_info
+    model["iteration_indptr"] = list(range(0, len(fused_trees) + 1, len(models)))
+    model["gbtree_model_param"]["num_trees"] = str(len(fused_trees))
+
+    booster = xgb.Booster()
+    booster.load_model(bytearray(json.dumps(fused).encode()))
+    return booster
+
+
+def add_fused_model(pipeline):
+    pipeline[FUSED_KEY] = fuse_models([pipeline[key] for key in TARGET_MODELS])
+    return pipeline
+
+
+# The saved fused model when the pipeline has one, otherwise fused in memory.
+# None when the regressors cannot be fused.
+def fused_model(pipeline):
+    if FUSED_KEY in pipeline:
+        return pipeline[FUSED_KEY]
+    if FUSED_FILE_KEY in pipeline:
+        import xgboost as xgb
+
+        return xgb.Booster(model_file=pipeline[FUSED_FILE_KEY])
+    try:
+        return fuse_models([pipeline[key] for key in TARGET_MODELS])
+    except ValueError:
+        return None
+
+
+# ADD THE FUSED MODEL TO A SAVED PIPELINE
+# python -m engine.fused models/pipeline_final_1.pkl [output.pkl]
+if __name__ == "__main__":
+    import joblib
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "models/pipeline_final_1.pkl"
+    dst = sys.argv[2] if len(sys.argv) > 2 else src
+    joblib.dump(add_fused_model(joblib.load(src)), dst)
+    print(dst)
@@ -0,0 +1,260 @@
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from engine.fused import TARGET_MODELS, fused_model
+from engine.metrics import stage
+
+BACKENDS = ("flat", "booster", "sklearn")
+
+# Objectives whose prediction is the raw margin (no link function)
+IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"}
+
+# Batches up to this size go through FlatForest, larger ones through XGBoost's
+# multithreaded inplace_predict.
+FLAT_MAX_ROWS = 32
+FLAT_BLOCK_ROWS = 4096
+
+# Pipeline key of a ready-made FlatForest (compact artifacts, engine/compact.py)
+FLAT_FOREST_KEY = "flat_forest"
+
+
+def _iteration_range(model):
+    # sklearn's predict() stops at best_iteration when early stopping was used
+    try:
+        return (0, model.best_iteration + 1)
+    except AttributeError:
+        return (0, 0)
+
+
+# SKLEARN BACKEND
+# The original path: a DataFrame through XGBRegressor.predict.
+class SklearnPredictor:
+
+    def __init__(self, pipeline):
+        self.models = [pipeline[key] for key in TARGET_MODELS]
+        self.columns = list(pipeline["feature_cols_model"])
+
+    def predict(self, X):
+        with stage("features.frame"):
+            frame = pd.DataFrame(X, columns=self.columns)
+        return np.column_stack([model.predict(frame) for model in self.models])
+
+    def set_threads(self, n):
+        for model in self.models:
+            model.set_params(n_jobs=n)
+
+
+# BOOSTER BACKEND
+# Booster.inplace_predict on a float32 array: no wrapper, no DMatrix, no
+# DataFrame. XGBoost casts inputs to float32 anyway, so results are identical.
+# With the fused model (engine/fused.py) all three targets come from one call.
+class BoosterPredictor:
+
+    def __init__(self, pipeline):
+        fused = fused_model(pipeline)
+        if fused is not None:
+            self.boosters = [fused]
+            self.ranges = [(0, 0)]
+        else:
+            self.boosters = [pipeline[key].get_booster() for key in TARGET_MODELS]
+            self.ranges = [_iteration_range(pipeline[key]) for key in TARGET_MODELS]
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return np.column_stack([
+            booster.inplace_predict(X, iteration_range=iteration_range, validate_features=False)
+            for booster, iteration_range in zip(self.boosters, self.ranges)
+        ])
+
+    def set_threads(self, n):
+        for booster in self.boosters:
+            booster.set_param({"nthread": n})
+
+
+# FLAT FOREST
+# All trees of the fused model exported once into flat NumPy node arrays
+# (feature, threshold, children, leaf value). Every tree is walked at once,
+# one vectorized step per depth level, so a single row costs a handful of
+# NumPy calls instead of three DMatrix round trips. Leaves point to
+# themselves, so rows that reach a leaf early just stay there.
+class FlatForest:
+
+    # What from_arrays() needs, besides depth and n_targets
+    ARRAYS = ("roots", "feature", "threshold", "children", "default_left", "value")
+
+    def __init__(self, booster):
+        self._features, self._thresholds, self._children, self._default_left, self._values = [], [], [], [], []
+        self._size = 0
+        self.depth = 0
+
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        if learner["objective"]["name"] not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+        gbm = learner["gradient_booster"]
+        if gbm["name"] != "gbtree":
+            raise ValueError(f"Unsupported booster: {gbm['name']}")
+        params = learner["learner_model_param"]
+        bases = [np.float32(b) for b in params["base_score"].strip("[]").split(",")]
+        self.n_targets = max(int(params["num_target"]), 1)
+        if len(bases) == 1:
+            bases = bases * self.n_targets
+
+        # The base score is stored as a one-leaf tree in front of each
+        # target's trees, which keep their boosting order.
+        segments = [[self._add_leaf(base)] for base in bases]
+        for tree, target in zip(gbm["model"]["trees"], gbm["model"]["tree_info"]):
+            segments[target].append(self._add_tree(tree))
+
+        # Pad every target to the same number of trees with zero leaves
+        # (adding 0.0 is exact), so all targets are summed by one cumsum.
+        width = max(len(roots) for roots in segments)
+        for roots in segments:
+            roots.extend(self._add_leaf(np.float32(0)) for _ in range(width - len(roots)))
+
+        self.roots = np.asarray([root for roots in segments for root in roots], dtype=np.int32)
+        self.feature = np.concatenate(self._features)
+        self.threshold = np.concatenate(self._thresholds)
+        self.children = np.concatenate(self._children)
+        self.default_left = np.concatenate(self._default_left)
+        self.value = np.concatenate(self._values)
+        del self._features, self._thresholds, self._children, self._default_left, self._values
+
+    # A forest over arrays exported earlier (e.g. memory-mapped .npy files)
+    @classmethod
+    def from_arrays(cls, arrays, depth, n_targets):
+        forest = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(forest, name, arrays[name])
+        forest.depth = depth
+        forest.n_targets = n_targets
+        return forest
+
+    def _add_leaf(self, value):
+        return self._add_nodes([0], [value], [-1], [-1], [True], [value])
+
+    def _add_tree(self, tree):
+        if any(tree["split_type"]):
+            raise ValueError("Categorical splits are not supported")
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        leaf = left == -1
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        self.depth = max(self.depth, self._tree_depth(left, tree["right_children"]))
+        return self._add_nodes(
+            np.where(leaf, 0, tree["split_indices"]), conditions, left, tree["right_children"],
+            tree["default_left"], np.where(leaf, conditions, 0),
+        )
+
+    # Appends one tree's nodes; children are interleaved as [left, right] per
+    # node and leaves point to themselves. Returns the root's global index.
+    def _add_nodes(self, features, thresholds, left, right, default_left, values):
+        n = len(features)
+        own = np.arange(self._size, self._size + n)
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        children = np.empty((n, 2), dtype=np.int64)
+        children[:, 0] = np.where(left == -1, own, left + self._size)
+        children[:, 1] = np.where(right == -1, own, right + self._size)
+
+        self._features.append(np.asarray(features, dtype=np.int64))
+        self._thresholds.append(np.asarray(thresholds, dtype=np.float32))
+        self._children.append(children.ravel())
+        self._default_left.append(np.asarray(default_left, dtype=bool))
+        self._values.append(np.asarray(values, dtype=np.float32))
+        self._size += n
+        return own[0]
+
+    @staticmethod
+    def _tree_depth(left, right):
+        depth, level = 0, [0]
+        while True:
+            level = [child for node in level for child in (left[node], right[node]) if child != -1]
+            if not level:
+                return depth
+            depth += 1
+
+    def _predict_block(self, X):
+        n, n_features = X.shape
+        flat = X.ravel()
+        offsets = np.arange(0, n * n_features, n_features)[:, None]
+        has_nan = np.isnan(flat).any()
+
+        node = np.broadcast_to(self.roots, (n, len(self.roots)))
+        for _ in range(self.depth):
+            x = flat[self.feature[node] + offsets]
+            go_right = x >= self.threshold[node]
+            if has_nan:
+                go_right |= np.isnan(x) & ~self.default_left[node]
+            node = self.children[2 * node + go_right]
+
+        # XGBoost adds the trees one after another in float32 onto the base
+        # score; a sequential cumsum reproduces that summation order exactly.
+        leaves = self.value[node].reshape(n, self.n_targets, -1)
+        return np.cumsum(leaves, axis=2, dtype=np.float32)[:, :, -1]
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) <= FLAT_BLOCK_ROWS:
+            return self._predict_block(X)
+        return np.concatenate([self._predict_block(X[i:i + FLAT_BLOCK_ROWS]) for i in range(0, len(X), FLAT_BLOCK_ROWS)])
+
+
+# FLAT BACKEND
+# FlatForest for small batches (the interactive pages and the API), XGBoost's
+# own multithreaded predictor for large ones. With a ready-made forest in the
+# pipeline, XGBoost is only imported and the booster only loaded at the first
+# large batch.
+class FlatPredictor:
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.threads = None
+        self._lock = threading.Lock()
+        self.forest = pipeline.get(FLAT_FOREST_KEY)
+        if self.forest is None:
+            self._booster = BoosterPredictor(pipeline)
+            if len(self._booster.boosters) != 1:
+                raise ValueError("FlatForest needs the fused model")
+            self.forest = FlatForest(self._booster.boosters[0])
+        else:
+            self._booster = None
+
+    @property
+    def booster(self):
+        if self._booster is None:
+            with self._lock:
+                if self._booster is None:
+                    booster = BoosterPredictor(self.pipeline)
+                    if self.threads is not None:
+                        booster.set_threads(self.threads)
+                    self._booster = booster
+        return self._booster
+
+    def predict(self, X):
+        if len(X) <= FLAT_MAX_ROWS:
+            return self.forest.predict(X)
+        return self.booster.predict(X)
+
+    def set_threads(self, n):
+        with self._lock:
+            self.threads = n
+            if self._booster is not None:
+                self._booster.set_threads(n)
+
+
+def make_predictor(pipeline, backend="flat"):
+    if backend == "sklearn":
+        if not all(key in pipeline for key in TARGET_MODELS):
+            raise ValueError("The sklearn backend needs the pickled regressors (MODEL_FORMAT=pickle)")
+        return SklearnPredictor(pipeline)
+    if backend == "booster":
+        return BoosterPredictor(pipeline)
+    if backend == "flat":
+        try:
+            return FlatPredictor(pipeline)
+        except ValueError:
+            # Model layout FlatForest does not handle: use XGBoost directly
+            return BoosterPredictor(pipeline)
+    raise ValueError(f"Unknown inference backend: {backend} (expected one of {', '.join(BACKENDS)})")
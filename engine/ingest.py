@@ -0,0 +1,64 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine.data import DATA_PATH, DTYPES, apply_delta, dataset_version, recruitment_ids
+from engine.storage import append_rows, write_lock
+
+
+# Membership in the sorted array of known IDs, O(log n) per new row
+def _is_known(ids, known):
+    if len(known) == 0:
+        return np.zeros(len(ids), dtype=bool)
+    pos = np.searchsorted(known, ids).clip(max=len(known) - 1)
+    return known[pos] == ids
+
+
+# INCREMENTAL INGESTION
+# Appends new recruitment rows to the dataset. Rows whose recruitment_id is
+# already in the dataset (or repeats an earlier row of the same batch) are
+# rejected. The accepted rows are appended to the CSV and its Parquet copy,
+# and the cached aggregates (KPIs, cube, per-source sketches, known IDs) are
+# updated from these rows alone, so the cost follows the size of the batch,
+# not of the history. The duplicate check and the append hold the dataset's
+# write lock (engine/storage.py), so concurrent ingests, in this process or
+# others, never both add the same recruitment_id.
+# Returns {"added": n, "rejected": [recruitment_id, ...]}.
+def ingest(rows, path=DATA_PATH):
+    missing = [col for col in DTYPES if col not in rows.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    rows = rows[list(DTYPES)]
+    if rows.isna().any().any():
+        raise ValueError("Rows with missing values cannot be ingested")
+    rows = rows.astype(DTYPES).reset_index(drop=True)
+
+    ids = rows["recruitment_id"].to_numpy()
+    repeated = rows["recruitment_id"].duplicated().to_numpy()
+    while True:
+        # The known IDs are read outside the lock (it must not be held while
+        # waiting for the aggregate cache), then checked to still be current.
+        version = dataset_version(path)
+        known = recruitment_ids(path)
+        with write_lock(path):
+            if dataset_version(path) != version:
+                continue
+            duplicate = _is_known(ids, known) | repeated
+            delta = rows[~duplicate].reset_index(drop=True)
+            if len(delta):
+                append_rows(path, delta, DTYPES)
+            new_version = dataset_version(path)
+        break
+
+    if len(delta):
+        apply_delta(path, version, new_version, delta)
+    return {"added": len(delta), "rejected": ids[duplicate].tolist()}
+
+
+# python -m engine.ingest new_rows.csv
+if __name__ == "__main__":
+    result = ingest(pd.read_csv(sys.argv[1]))
+    print(f"{result['added']} rows added, {len(result['rejected'])} rejected (duplicate recruitment_id)")
+    if result["rejected"]:
+        print("rejected:", ", ".join(map(str, result["rejected"])))
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# STAGE TIMINGS
+# `with stage("predict"):` records the time spent in a stage of the
+# features -> predict -> score -> render path (count, total, max per stage).
+# Off unless STAGE_TIMINGS=1 or enable() was called: stage() then returns one
+# shared no-op context manager, so a disabled stage costs a global lookup.
+_enabled = os.environ.get("STAGE_TIMINGS", "0") == "1"
+
+_lock = threading.Lock()
+_stats = {}
+_NOOP = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+
+
+def stage(name):
+    if not _enabled:
+        return _NOOP
+    return _Stage(name)
+
+
+def record(name, seconds):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            _stats[name] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def snapshot():
+    with _lock:
+        return {
+            name: {"count": count, "total_s": total, "mean_ms": total / count * 1000, "max_ms": peak * 1000}
+            for name, (count, total, peak) in sorted(_stats.items())
+        }
+
+
+# EXPORT
+# Prometheus text format (one summary, plus a max gauge, labelled by stage) ...
+def prometheus(prefix="recruitment"):
+    stats = snapshot()
+    lines = [
+        f"# HELP {prefix}_stage_seconds Time spent per pipeline stage.",
+        f"# TYPE {prefix}_stage_seconds summary",
+    ]
+    for name, s in stats.items():
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s["total_s"]:.9f}')
+    lines += [
+        f"# HELP {prefix}_stage_seconds_max Longest single call per pipeline stage.",
+        f"# TYPE {prefix}_stage_seconds_max gauge",
+    ]
+    for name, s in stats.items():
+        lines.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {s["max_ms"] / 1000:.9f}')
+    return "\n".join(lines) + "\n"
+
+
+# ... or one JSON line per snapshot, appended to a log file.
+def json_line():
+    return json.dumps({"time": time.time(), "pid": os.getpid(), "stages": snapshot()})
+
+
+def write_json_log(path):
+    with open(path, "a") as f:
+        f.write(json_line() + "\n")
+
+
+# PERIODIC JSON LOG
+# With STAGE_TIMINGS_LOG=<path>, stage timings are recorded (as with
+# STAGE_TIMINGS=1) and the app and the API append a snapshot to that file
+# every STAGE_TIMINGS_LOG_INTERVAL seconds (default 60), the API once more on
+# shutdown. The totals are cumulative per process (see the "pid" field);
+# reset() starts them over.
+LOG_PATH = os.environ.get("STAGE_TIMINGS_LOG")
+LOG_INTERVAL = float(os.environ.get("STAGE_TIMINGS_LOG_INTERVAL", "60"))
+
+_log_stop = threading.Event()
+_log = None
+
+
+# Starts the writer in a daemon thread, once per process.
+def start_json_log(path=LOG_PATH, interval=LOG_INTERVAL):
+    global _log
+    if not path:
+        return
+    enable()
+    with _lock:
+        if _log is not None:
+            return
+        _log_stop.clear()
+
+        def run():
+            while not _log_stop.wait(interval):
+                write_json_log(path)
+        _log = (threading.Thread(target=run, name="stage-timings-log", daemon=True), path)
+        _log[0].start()
+
+
+# Stops the writer and appends a last snapshot.
+def stop_json_log():
+    global _log
+    with _lock:
+        log, _log = _log, None
+    if log is None:
+        return
+    thread, path = log
+    _log_stop.set()
+    thread.join()
+    write_json_log(path)
@@ -0,0 +1,264 @@
+import os
+import sys
+import threading
+import time
+import weakref
+
+from engine.compact import compact_path, load as load_compact, read_meta
+from engine.features import FeatureBuilder
+from engine.registry import DEFAULT_VERSION, MANIFEST_PATH, component_hash, file_sha256, read_manifest, version_path
+
+# `model_path` arguments across engine/ take a pickle path, a version name
+# from models/manifest.json, or ACTIVE: the manifest's active version, which
+# is the default everywhere (see engine/registry.py).
+ACTIVE = "active"
+MODEL_PATH = ACTIVE
+
+# "flat" (default), "booster" or "sklearn", see engine/inference.py
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "flat")
+
+# "compact" (default): serve models/compact/<version>.json when it was exported
+# from the current pickle (see engine/compact.py), the pickle otherwise.
+# "pickle": always joblib.load the pickle.
+MODEL_FORMAT = os.environ.get("MODEL_FORMAT", "compact")
+
+FEATURE_KEYS = ["scaler_cluster", "kmeans", "cluster_features_columns", "feature_cols_model"]
+PREDICTOR_KEYS = ["model_time", "model_cost", "model_oar", "model_fused"]
+
+
+# SHARED COMPONENTS
+# Pipeline entries, feature builders and predictors are shared by content
+# hash, so versions built from the same boosters / scaler / KMeans hold one
+# copy of them (pipeline entries only between versions of the same format).
+# Weak references: a component goes away with the last loaded version that
+# uses it. (Column lists cannot be weakly referenced and stay per version;
+# they are small.)
+_shared_lock = threading.Lock()
+_components = weakref.WeakValueDictionary()
+_builders = weakref.WeakValueDictionary()
+_predictors = weakref.WeakValueDictionary()
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# LOADED MODEL
+# One pipeline version with its feature builder and predictors. It never
+# changes once built: a request that takes one LoadedModel (get_model) uses
+# the same version from the features to the scores, even if another version
+# is swapped in meanwhile.
+class LoadedModel:
+
+    def __init__(self, name, path, entry=None):
+        self.name = name
+        self.path = path
+        self.stat = _file_stat(path)
+        sha256 = file_sha256(path)
+        self.version = sha256[:16]
+        pipeline, hashes = self._read(sha256, entry)
+
+        self.pipeline = {}
+        with _shared_lock:
+            for key, value in pipeline.items():
+                if key not in hashes:
+                    self.pipeline[key] = value
+                    continue
+                shared = _components.get((self.format, hashes[key]))
+                if shared is None:
+                    shared = value
+                    try:
+                        _components[(self.format, hashes[key])] = value
+                    except TypeError:
+                        pass
+                self.pipeline[key] = shared
+
+        self._feature_key = tuple(hashes.get(key) for key in FEATURE_KEYS)
+        self._predictor_key = tuple(hashes.get(key) for key in PREDICTOR_KEYS)
+        self._features = None
+        self._predictors = {}
+
+    # The compact export of this very pickle when there is one, else the pickle
+    def _read(self, sha256, entry):
+        if MODEL_FORMAT == "compact" and INFERENCE_BACKEND != "sklearn":
+            meta = read_meta(compact_path(self.path))
+            if meta is not None and meta["source_sha256"] == sha256:
+                self.format = "compact"
+                pipeline, meta = load_compact(compact_path(self.path))
+                return pipeline, meta["components"]
+
+        import joblib
+
+        self.format = "pickle"
+        pipeline = joblib.load(self.path)
+        # Component hashes from the manifest, unless the pickle changed since
+        if entry is not None and entry["sha256"] == sha256:
+            return pipeline, entry["components"]
+        return pipeline, {key: component_hash(value) for key, value in pipeline.items()}
+
+    @property
+    def features(self):
+        if self._features is None:
+            with _shared_lock:
+                builder = _builders.get(self._feature_key)
+                if builder is None:
+                    builder = FeatureBuilder(self.pipeline)
+                    _builders[self._feature_key] = builder
+                self._features = builder
+        return self._features
+
+    # The boosters are exported to the inference backend once, at first use.
+    def predictor(self, backend=None):
+        backend = backend or INFERENCE_BACKEND
+        predictor = self._predictors.get(backend)
+        if predictor is None:
+            from engine.inference import make_predictor
+
+            key = self._predictor_key + (backend,)
+            with _shared_lock:
+                predictor = _predictors.get(key)
+                if predictor is None:
+                    predictor = make_predictor(self.pipeline, backend)
+                    _predictors[key] = predictor
+                self._predictors[backend] = predictor
+        return predictor
+
+    # Builds everything a request needs and runs one prediction
+    def warm(self):
+        X = self.features.build(["Engineering"], ["Software Engineer"], ["Referral"], [150], [45], [5000.0], [0.65])
+        self.predictor().predict(X)
+        return self
+
+
+# MODEL REGISTRY
+# Nothing is loaded at import time, and joblib / XGBoost (and the
+# scikit-learn objects in the pickle) are only imported on first load.
+#
+# The active version is loaded on first use. When the manifest names another
+# version (or its pickle is replaced), the new one is loaded and warmed up in
+# a background thread while requests keep getting the current one, then
+# swapped in with a single assignment: no restart, no request waits for it.
+_lock = threading.Lock()
+_active = None
+_loading = None
+_failed = set()
+_by_path = {}
+_manifest = (None, None)
+
+
+def _read_manifest():
+    global _manifest
+    try:
+        stat = _file_stat(MANIFEST_PATH)
+    except FileNotFoundError:
+        return None
+    if _manifest[0] != stat:
+        _manifest = (stat, read_manifest(MANIFEST_PATH))
+    return _manifest[1]
+
+
+# (name, path, file stat, manifest entry) of the version that should be served
+def _wanted():
+    manifest = _read_manifest()
+    name = manifest["active"] if manifest else DEFAULT_VERSION
+    path = version_path(name)
+    entry = manifest["artifacts"].get(name) if manifest else None
+    return name, path, _file_stat(path), entry
+
+
+def _swap_in_background(name, path, stat, entry):
+    global _loading
+
+    with _lock:
+        if _loading is not None or (name, stat) in _failed:
+            return
+        _loading = (name, stat)
+
+    def run():
+        global _active, _loading
+        start = time.perf_counter()
+        try:
+            model = LoadedModel(name, path, entry).warm()
+        except Exception as e:
+            _failed.add((name, stat))
+            print(f"model: could not load {name}: {e}", file=sys.stderr)
+        else:
+            _active = model
+            print(f"model: now serving {name} ({model.version}, {model.format}), loaded in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        finally:
+            _loading = None
+    threading.Thread(target=run, name=f"load-{name}", daemon=True).start()
+
+
+def active_model():
+    global _active
+    name, path, stat, entry = _wanted()
+    current = _active
+    if current is None:
+        with _lock:
+            if _active is None:
+                _active = LoadedModel(name, path, entry)
+            return _active
+    if (current.name, current.stat) != (name, stat):
+        _swap_in_background(name, path, stat, entry)
+    return current
+
+
+def _model_at(name, path):
+    model = _by_path.get(path)
+    if model is None or model.stat != _file_stat(path):
+        with _lock:
+            model = _by_path.get(path)
+            if model is None or model.stat != _file_stat(path):
+                manifest = _read_manifest()
+                entry = manifest["artifacts"].get(name) if manifest else None
+                model = LoadedModel(name, path, entry)
+                _by_path[path] = model
+    return model
+
+
+# A LoadedModel is passed through, so callers can hand one snapshot down.
+def get_model(path=MODEL_PATH):
+    if isinstance(path, LoadedModel):
+        return path
+    if path == ACTIVE:
+        return active_model()
+    manifest = _read_manifest()
+    if manifest and path in manifest["artifacts"]:
+        return _model_at(path, version_path(path))
+    return _model_at(os.path.splitext(os.path.basename(path))[0], path)
+
+
+# Starts serving another version of the manifest (background load + swap)
+def activate(version):
+    from engine.registry import set_active
+
+    set_active(version)
+    active_model()
+
+
+# Name of the manifest version being served (or about to be)
+def active_version():
+    return _wanted()[0]
+
+
+# Version id of the model `path` serves. Does not load the active model: until
+# it is loaded, the manifest's hash (or the pickle's mtime/size) stands for it.
+def model_version(path=MODEL_PATH):
+    if isinstance(path, LoadedModel):
+        return path.version
+    if path == ACTIVE:
+        if _active is not None:
+            return active_model().version
+        name, path, stat, entry = _wanted()
+        if entry is not None:
+            return entry["sha256"][:16]
+        return f"{stat[0]}-{stat[1]}"
+    return get_model(path).version
+
+
+def is_loaded(path=MODEL_PATH):
+    if path == ACTIVE:
+        return _active is not None
+    return any(model.name == path or model.path == path for model in _by_path.values())
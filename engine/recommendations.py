@@ -0,0 +1,123 @@
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from engine.data import DATA_PATH, dataset_version, source_stats
+from engine.metrics import stage
+from engine.models import MODEL_PATH, get_model, model_version
+from engine.scoring import PRED_COLUMNS, SCALED_COLUMNS, predict_targets, scale_predictions, optimal_score
+
+TABLE_PATH = "models/recommendations.parquet"
+
+DEPARTMENT_JOBS = {
+    "Engineering": ["Software Engineer","DevOps Engineer","Backend Developer","Data Engineer"],
+    "Sales": ["Account Executive","Business Development Manager","Sales Associate","Sales Representative"],
+    "Product": ["Product Manager","Product Analyst","UX Designer","UI Designer"],
+    "HR": ["HR Coordinator","Recruitment Specialist","Talent Acquisition","HR Manager","Payroll Specialist"],
+    "Marketing": ["Marketing Specialist","Social Media Manager","Content Strategist","SEO Analyst"],
+    "Finance": ["Accountant","Finance Manager","Financial Analyst","Payroll Specialist"]
+}
+
+
+# RECOMMENDATION TABLE
+# Predictions for the Optimal Score page depend only on (dept, job, source)
+# and the per-source medians of the reference dataset, so the whole
+# department x job x source grid is scored in one batch and PREDICT becomes a
+# lookup. Weights are applied afterwards with optimal_score().
+def build_table(model_path=MODEL_PATH, data_path=DATA_PATH):
+    model = get_model(model_path)
+    data = source_stats(data_path)
+    sources = list(data.keys())
+
+    pairs = [(dept, job) for dept, jobs in DEPARTMENT_JOBS.items() for job in jobs]
+    depts = [dept for dept, _ in pairs for _ in sources]
+    jobs = [job for _, job in pairs for _ in sources]
+    srcs = sources * len(pairs)
+
+    X = model.features.build(
+        depts, jobs, srcs,
+        [data[s]["a"] for s in srcs],
+        [data[s]["t"] for s in srcs],
+        [data[s]["c"] for s in srcs],
+        [data[s]["o"] for s in srcs],
+    )
+    preds = np.column_stack(predict_targets(model.predictor(), X))
+    scaled = scale_predictions(model.pipeline, preds)
+
+    table = pd.DataFrame({"department": depts, "job_title": jobs, "source": srcs})
+    table[PRED_COLUMNS] = preds
+    table[SCALED_COLUMNS] = scaled
+    return table
+
+
+def _table_version(model_path, data_path):
+    return {"model": model_version(model_path), "data": list(dataset_version(data_path))}
+
+
+# OFFLINE PRECOMPUTE (python -m engine.recommendations)
+def save_table(path=TABLE_PATH, model_path=MODEL_PATH, data_path=DATA_PATH):
+    model = get_model(model_path)
+    table = pa.Table.from_pandas(build_table(model, data_path), preserve_index=False)
+    version = json.dumps(_table_version(model, data_path)).encode()
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"source_version": version})
+    pq.write_table(table, path)
+    return path
+
+
+def _read_saved(path, version):
+    try:
+        table = pq.read_table(path)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    saved = (table.schema.metadata or {}).get(b"source_version")
+    if saved is None or json.loads(saved) != version:
+        return None
+    return table.to_pandas()
+
+
+def saved_table_is_current(path=TABLE_PATH, model_path=MODEL_PATH, data_path=DATA_PATH):
+    return _read_saved(path, _table_version(model_path, data_path)) is not None
+
+
+_lock = threading.Lock()
+_tables = {}
+
+
+# Uses the saved table when it was built from the current model and dataset,
+# otherwise scores the grid in-process. Either way it happens once per version.
+def recommendation_table(path=TABLE_PATH, model_path=MODEL_PATH, data_path=DATA_PATH):
+    version = _table_version(model_path, data_path)
+    key = (path, model_path, data_path, json.dumps(version))
+    table = _tables.get(key)
+    if table is None:
+        with _lock:
+            table = _tables.get(key)
+            if table is None:
+                table = _read_saved(path, version)
+                if table is None:
+                    # Built from one model snapshot and filed under its version,
+                    # in case another version was swapped in meanwhile
+                    model = get_model(model_path)
+                    table = build_table(model, data_path)
+                    key = (path, model_path, data_path, json.dumps(_table_version(model, data_path)))
+                _tables.clear()
+                _tables[key] = table
+    return table
+
+
+def lookup(dept, job, **kwargs):
+    with stage("lookup"):
+        table = recommendation_table(**kwargs)
+        return table[(table["department"] == dept) & (table["job_title"] == job)]
+
+
+def rank(rows, time_w, cost_w, oar_w):
+    return optimal_score(rows[SCALED_COLUMNS].to_numpy(), time_w, cost_w, oar_w)
+
+
+if __name__ == "__main__":
+    print(save_table())
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+from engine.compact import compact_path, read_meta
+
+MODELS_DIR = "models"
+MANIFEST_PATH = os.path.join(MODELS_DIR, "manifest.json")
+
+# The version served when there is no manifest yet
+DEFAULT_VERSION = "pipeline_final_1"
+
+# What a pickle needs to be served by engine/models.py
+REQUIRED_KEYS = [
+    "model_time", "model_cost", "model_oar",
+    "scaler_cluster", "scaler_optimal", "kmeans",
+    "cluster_features_columns", "feature_cols_model",
+]
+SCHEMA_KEYS = ["feature_cols_model", "preprocess_columns", "cluster_features_columns"]
+
+
+# ARTIFACT FINGERPRINTS
+# sha256 of the file, plus one hash per pipeline entry (its pickled bytes):
+# versions that share an entry (the same boosters, scaler or KMeans) get the
+# same component hash, which is how engine/models.py shares them in memory.
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def component_hash(obj):
+    return hashlib.sha1(pickle.dumps(obj, protocol=4)).hexdigest()
+
+
+def describe(path, pipeline):
+    return {
+        "file": os.path.basename(path),
+        "sha256": file_sha256(path),
+        "size": os.path.getsize(path),
+        "components": {key: component_hash(value) for key, value in pipeline.items()},
+        "schema": {key: list(pipeline[key]) for key in SCHEMA_KEYS if key in pipeline},
+        "servable": all(key in pipeline for key in REQUIRED_KEYS),
+    }
+
+
+# The compact export (engine/compact.py) is generated at build time, so it is
+# looked up on disk rather than recorded in the manifest: True when
+# models/compact/<version>.json was exported from this very pickle.
+def has_compact(version, artifact):
+    meta = read_meta(compact_path(version_path(version)))
+    return meta is not None and meta["source_sha256"] == artifact["sha256"]
+
+
+# MANIFEST (models/manifest.json)
+# {"active": version, "artifacts": {version: describe(...)}}, one version per
+# pickle in models/, named after the file.
+def scan(models_dir=MODELS_DIR, previous=None):
+    import joblib
+
+    artifacts = {}
+    for name in sorted(os.listdir(models_dir)):
+        if name.endswith(".pkl"):
+            path = os.path.join(models_dir, name)
+            artifacts[os.path.splitext(name)[0]] = describe(path, joblib.load(path))
+
+    active = (previous or {}).get("active", DEFAULT_VERSION)
+    if active not in artifacts:
+        active = DEFAULT_VERSION
+    return {"active": active, "artifacts": artifacts}
+
+
+def read_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# Written to a temporary file and renamed, so readers never see half a manifest
+def write_manifest(manifest, path=MANIFEST_PATH):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def set_active(version, path=MANIFEST_PATH):
+    manifest = read_manifest(path)
+    if manifest is None or version not in manifest["artifacts"]:
+        raise ValueError(f"Unknown model version: {version}")
+    missing = [key for key in REQUIRED_KEYS if key not in manifest["artifacts"][version]["components"]]
+    if missing:
+        raise ValueError(f"Model version {version} lacks {', '.join(missing)}")
+    manifest["active"] = version
+    write_manifest(manifest, path)
+
+
+def version_path(version, models_dir=MODELS_DIR):
+    return os.path.join(models_dir, f"{version}.pkl")
+
+
+# python -m engine.registry              rescan models/ and list the versions
+# python -m engine.registry activate V   make V the active version; running
+#                                        processes load it in the background
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["activate"]:
+        set_active(sys.argv[2])
+    else:
+        write_manifest(scan(previous=read_manifest()))
+
+    manifest = read_manifest()
+    for version, artifact in manifest["artifacts"].items():
+        mark = "*" if version == manifest["active"] else " "
+        state = "" if artifact["servable"] else "  (not servable)"
+        if has_compact(version, artifact):
+            state += "  compact"
+        print(f"{mark} {version:<20} {artifact['sha256'][:12]}  {artifact['size']:>9,} B{state}")
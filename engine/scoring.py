@@ -0,0 +1,130 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from engine.metrics import stage
+from engine.models import MODEL_PATH, get_model
+
+PRED_COLUMNS = ["pred_time", "pred_cost", "pred_oar"]
+SCALED_COLUMNS = ["scaled_time", "scaled_cost", "scaled_oar"]
+
+
+# PREDICT TARGETS
+# One predictor call for the whole batch (see LoadedModel.predictor), clipped like the views do.
+def predict_targets(predictor, X):
+    with stage("predict"):
+        preds = predictor.predict(X)
+    pred_time = np.maximum(preds[:, 0], 0.00001)
+    pred_cost = np.maximum(preds[:, 1], 0)
+    pred_oar  = np.clip(preds[:, 2], 0, 1)
+    return pred_time, pred_cost, pred_oar
+
+
+# SCALE PREDICTIONS
+# "model": the pipeline's scaler_optimal, fitted on the training predictions
+#          (Optimal Score page, batch scoring, API).
+# "relative": min-max across the rows being compared (Predict New Dataset page).
+def scale_predictions(pipeline, preds, scaling="model"):
+    with stage("scale"):
+        if scaling == "model":
+            # MinMaxScaler.transform without sklearn's per-call input validation
+            scaler = pipeline["scaler_optimal"]
+            scaled = preds.astype(np.float64) * scaler.scale_ + scaler.min_
+            if scaler.clip:
+                scaled = np.clip(scaled, *scaler.feature_range)
+            return scaled
+        if scaling == "relative":
+            pred_min = preds.min(axis=0)
+            pred_range = np.maximum(preds.max(axis=0) - pred_min, 0.00001)
+            return (preds - pred_min) / pred_range
+    raise ValueError(f"Unknown scaling: {scaling}")
+
+
+# OPTIMAL SCORE
+# Weights may be scalars or per-row arrays.
+def optimal_score(scaled, time_w, cost_w, oar_w):
+    with stage("score"):
+        scaled = np.asarray(scaled)
+        return (
+            time_w * (1 - scaled[:, 0]) +
+            cost_w * (1 - scaled[:, 1]) +
+            oar_w * scaled[:, 2]
+        )
+
+
+# WEIGHT SWEEP
+# Every (time_w, cost_w, oar_w) on the weight simplex with the given step,
+# scored against all rows in one matrix product: (m, 3) @ (3, k).
+# The step must divide 1 (0.05, 0.02, 0.01, ...), so that the grid reaches
+# every corner and the points are exactly `step` apart.
+def grid_divisions(step):
+    n = round(1 / step)
+    if n < 1 or abs(n * step - 1) > 1e-9:
+        raise ValueError(f"step must divide 1 (e.g. 0.05, 0.02, 0.01), got {step}")
+    return n
+
+
+def weight_grid(step=0.05):
+    n = grid_divisions(step)
+    i, j = np.meshgrid(np.arange(n + 1), np.arange(n + 1), indexing="ij")
+    keep = i + j <= n
+    i, j = i[keep], j[keep]
+    return np.column_stack([i, j, n - i - j]) / n
+
+
+def weight_sweep(scaled, step=0.05):
+    scaled = np.asarray(scaled, dtype=np.float64)
+    benefit = np.column_stack([1 - scaled[:, 0], 1 - scaled[:, 1], scaled[:, 2]])
+    grid = weight_grid(step)
+    return grid, grid @ benefit.T
+
+
+# Share of the weight grid on which each row has the highest score
+def win_shares(scaled, step=0.05):
+    grid, scores = weight_sweep(scaled, step)
+    return np.bincount(scores.argmax(axis=1), minlength=len(scores[0])) / len(grid)
+
+
+# WINNER MAP
+# For every point of the weight grid: the index of the best row and its lead
+# over the runner-up, all from the single weight_sweep() matrix product.
+def winner_map(scaled, step=0.01):
+    grid, scores = weight_sweep(scaled, step)
+    winner = scores.argmax(axis=1)
+    if scores.shape[1] < 2:
+        return grid, winner, np.full(len(grid), np.inf)
+    top2 = np.partition(scores, -2, axis=1)[:, -2:]
+    return grid, winner, top2[:, 1] - top2[:, 0]
+
+
+# Stable fingerprint of a {source: {"a", "t", "c", "o"}} dict, used to key
+# cached predictions for an uploaded dataset.
+def stats_hash(source_data):
+    payload = json.dumps(source_data, sort_keys=True, default=float)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+# SCORE SOURCES
+# Full scoring path for one department/job over a {source: {"a", "t", "c", "o"}}
+# dict: features -> three regressors -> scaling -> weighted optimal score.
+# Returns one row per source, in the order of `source_data`. predict_sources
+# stops before the weights (see engine/cache.py), score_sources applies them.
+def predict_sources(dept, job, source_data, scaling="model", time_floor=None, model_path=MODEL_PATH):
+    model = get_model(model_path)
+
+    X = model.features.build_for_sources(dept, job, source_data, time_floor=time_floor)
+    preds = np.column_stack(predict_targets(model.predictor(), X))
+    scaled = scale_predictions(model.pipeline, preds, scaling)
+
+    result = pd.DataFrame({"source": list(source_data.keys())})
+    result[PRED_COLUMNS] = preds
+    result[SCALED_COLUMNS] = scaled
+    return result
+
+
+def score_sources(dept, job, source_data, time_w, cost_w, oar_w, scaling="model", time_floor=None, model_path=MODEL_PATH):
+    result = predict_sources(dept, job, source_data, scaling, time_floor, model_path)
+    result["optimal_score"] = optimal_score(result[SCALED_COLUMNS].to_numpy(), time_w, cost_w, oar_w)
+    return result
@@ -0,0 +1,306 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+PARTITION_COLUMNS = ["department", "source"]
+VERSION_FILE = "_source_version.json"
+POINTER_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+SUPERSEDED_FILE = "_superseded"
+APPENDS_FILE = "_appends.json"
+
+# How long a replaced copy is kept for readers still reading it (seconds)
+RETIRED_COPY_TTL = 300
+
+_partitioning = ds.partitioning(
+    pa.schema([(col, pa.string()) for col in PARTITION_COLUMNS]), flavor="hive"
+)
+_filesystem = pafs.LocalFileSystem(use_mmap=True)
+
+
+# COLUMNAR COPY OF THE CSV
+# The CSV stays the source of truth. It is converted once into a Parquet
+# dataset partitioned by department/source next to it, and converted again
+# only when the CSV's (mtime, size) changes.
+#
+# <name>.parquet/ holds one directory per conversion (v-<id>/) and CURRENT,
+# the name of the one to read. A new copy is written in full, then published
+# by replacing CURRENT, so readers only ever open a complete copy. Writers
+# (conversion, append) hold an inter-process lock on <name>.parquet/.lock,
+# so concurrent processes (API workers, score_cli.py workers, app replicas)
+# convert the CSV once and never step on each other.
+def parquet_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def current_copy(csv_path):
+    try:
+        with open(os.path.join(parquet_path(csv_path), POINTER_FILE)) as f:
+            return os.path.join(parquet_path(csv_path), f.read().strip())
+    except OSError:
+        return None
+
+
+def _csv_version(csv_path):
+    stat = os.stat(csv_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def is_fresh(csv_path):
+    copy = current_copy(csv_path)
+    if copy is None:
+        return False
+    try:
+        with open(os.path.join(copy, VERSION_FILE)) as f:
+            return json.load(f) == _csv_version(csv_path)
+    except (OSError, ValueError):
+        return False
+
+
+# Re-entrant within a thread, so ingest can hold it around its duplicate
+# check and the append.
+_held = threading.local()
+
+
+@contextmanager
+def write_lock(csv_path):
+    root = os.path.abspath(parquet_path(csv_path))
+    held = _held.__dict__.setdefault("roots", set())
+    if root in held:
+        yield
+        return
+
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), "a+") as f:
+        if os.name == "nt":
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        else:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        held.add(root)
+        try:
+            yield
+        finally:
+            held.discard(root)
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _new_copy(csv_path):
+    return os.path.join(parquet_path(csv_path), f"v-{uuid.uuid4().hex}")
+
+
+def _write_version(copy, csv_path):
+    with open(os.path.join(copy, VERSION_FILE), "w") as f:
+        json.dump(_csv_version(csv_path), f)
+
+
+# Points CURRENT to `copy`. Replaced copies are kept RETIRED_COPY_TTL
+# seconds for readers that may still be reading them, then removed along
+# with anything an interrupted writer left behind. Called with the lock held.
+def _publish(csv_path, copy):
+    root = parquet_path(csv_path)
+    previous = current_copy(csv_path)
+    tmp = os.path.join(root, f"{POINTER_FILE}.tmp-{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(os.path.basename(copy))
+    os.replace(tmp, os.path.join(root, POINTER_FILE))
+    if previous is not None and os.path.isdir(previous):
+        open(os.path.join(previous, SUPERSEDED_FILE), "w").close()
+
+    now = time.time()
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name in (POINTER_FILE, LOCK_FILE) or path == copy:
+            continue
+        try:
+            retired = os.path.getmtime(os.path.join(path, SUPERSEDED_FILE))
+            if now - retired < RETIRED_COPY_TTL:
+                continue
+        except OSError:
+            pass
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+def _convert(csv_path, dtypes):
+    copy = _new_copy(csv_path)
+    df = pd.read_csv(csv_path, dtype=dtypes)
+    for col in PARTITION_COLUMNS:
+        df[col] = df[col].astype(str)
+
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        copy,
+        format="parquet",
+        partitioning=_partitioning,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    _write_version(copy, csv_path)
+    _publish(csv_path, copy)
+    return copy
+
+
+def convert_csv(csv_path, dtypes=None):
+    with write_lock(csv_path):
+        return _convert(csv_path, dtypes)
+
+
+# Converts when the copy is stale; a process that waited for the lock finds
+# the copy another one just made and uses it.
+def ensure_parquet(csv_path, dtypes=None):
+    if not is_fresh(csv_path):
+        with write_lock(csv_path):
+            if not is_fresh(csv_path):
+                return _convert(csv_path, dtypes)
+    return current_copy(csv_path)
+
+
+# Hard links where the filesystem allows them: the files are never modified
+def _link(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+# APPEND
+# New rows go to the end of the CSV and into one new Parquet file per
+# department/source partition, instead of converting the whole CSV again.
+# The whole append holds the writers' lock. The new copy hard-links the
+# current copy's files, adds the new ones, and is published only after the
+# CSV has been appended. Until then readers keep the previous copy, and a
+# reader that sees the longer CSV first waits for the lock and then finds
+# the new copy fresh instead of converting (and counting the rows twice). If
+# the process stops half way, the copy is stale and gets converted on next
+# read. Each append adds files; `python -m engine.storage` rewrites the copy
+# compactly.
+#
+# The copy also logs its appends since the last full conversion (_appends.json:
+# CSV version before and after, and the files added), so other processes can
+# read just the new rows (see appended_rows).
+def _read_appends(copy):
+    try:
+        with open(os.path.join(copy, APPENDS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def append_rows(csv_path, df, dtypes=None):
+    with write_lock(csv_path):
+        if not is_fresh(csv_path):
+            _convert(csv_path, dtypes)
+
+        with open(csv_path, "rb+") as f:
+            header = f.readline().decode().strip().split(",")
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+        df = df[header]
+
+        previous = current_copy(csv_path)
+        appends = _read_appends(previous)
+        old_version = _csv_version(csv_path)
+        copy = _new_copy(csv_path)
+        shutil.copytree(previous, copy, copy_function=_link, ignore=shutil.ignore_patterns(VERSION_FILE, APPENDS_FILE))
+        table = df.copy()
+        for col in PARTITION_COLUMNS:
+            table[col] = table[col].astype(str)
+        prefix = f"append-{uuid.uuid4().hex}-"
+        ds.write_dataset(
+            pa.Table.from_pandas(table, preserve_index=False),
+            copy,
+            format="parquet",
+            partitioning=_partitioning,
+            basename_template=f"{prefix}{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        parts = [
+            os.path.relpath(os.path.join(folder, name), copy)
+            for folder, _, names in os.walk(copy) for name in names if name.startswith(prefix)
+        ]
+
+        with open(csv_path, "a", newline="") as f:
+            if needs_newline:
+                f.write("\n")
+            df.to_csv(f, header=False, index=False)
+        appends.append({"from": old_version, "to": _csv_version(csv_path), "parts": sorted(parts)})
+        with open(os.path.join(copy, APPENDS_FILE), "w") as f:
+            json.dump(appends, f)
+        _write_version(copy, csv_path)
+        _publish(csv_path, copy)
+    return copy
+
+
+# The rows appended while the CSV went from `old_version` to `new_version`
+# ((mtime_ns, size) pairs), read from the appended files alone. None when the
+# current copy cannot tell: converted in full since, not yet published, or
+# already removed.
+def appended_rows(csv_path, old_version, new_version, columns=None, dtypes=None):
+    copy = current_copy(csv_path)
+    if copy is None:
+        return None
+    try:
+        with open(os.path.join(copy, VERSION_FILE)) as f:
+            if json.load(f) != list(new_version):
+                return None
+        appends = _read_appends(copy)
+        start = [entry["from"] for entry in appends].index(list(old_version))
+        parts = [os.path.join(copy, part) for entry in appends[start:] for part in entry["parts"]]
+        dataset = ds.dataset(
+            parts, format="parquet", partitioning=_partitioning, partition_base_dir=copy, filesystem=_filesystem,
+        )
+        df = dataset.to_table(columns=columns).to_pandas()
+    except (OSError, ValueError):
+        return None
+
+    for col, dtype in (dtypes or {}).items():
+        if col in df.columns and str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+# READ
+# Only the requested columns are decoded. Files are memory-mapped.
+def read_parquet(csv_path, columns=None, dtypes=None):
+    dataset = ds.dataset(
+        ensure_parquet(csv_path, dtypes),
+        format="parquet",
+        partitioning=_partitioning,
+        filesystem=_filesystem,
+    )
+    df = dataset.to_table(columns=columns).to_pandas()
+
+    for col, dtype in (dtypes or {}).items():
+        if col in df.columns and str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+if __name__ == "__main__":
+    from engine.data import DATA_PATH, DTYPES
+    print(convert_csv(DATA_PATH, DTYPES))
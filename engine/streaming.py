@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+
+from engine.aggregation import UPLOAD_SUMMARY, MOMENT_STATS, parse_stat, sorted_quantile, sorted_trimmed_mean
+from engine.metrics import stage
+
+UPLOAD_COLUMNS = ["time_to_hire_days", "cost_per_hire", "offer_acceptance_rate", "source"]
+CHUNK_SIZE = 100_000
+
+
+# QUANTILE SKETCH
+# Mergeable streaming quantiles. Values are kept exactly up to `exact_limit`
+# (so ordinary uploads get the same median as pandas), after that they are
+# folded into a merging t-digest whose size is bounded by `compression`.
+class QuantileSketch:
+
+    def __init__(self, compression=1000, exact_limit=200_000):
+        self.compression = compression
+        self.exact_limit = exact_limit
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._exact = []
+        self._means = None
+        self._weights = None
+
+    @property
+    def is_exact(self):
+        return self._means is None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.count += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        if self.is_exact:
+            self._exact.append(values)
+            if self.count > self.exact_limit:
+                self._to_digest()
+        else:
+            self._compress(values, np.ones_like(values))
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        if self.is_exact and other.is_exact and self.count + other.count <= self.exact_limit:
+            self._exact.extend(other._exact)
+            self.count += other.count
+            return self
+
+        if self.is_exact:
+            self._to_digest()
+        if other.is_exact:
+            means = np.concatenate(other._exact)
+            weights = np.ones_like(means)
+        else:
+            means, weights = other._means, other._weights
+        self.count += other.count
+        self._compress(means, weights)
+        return self
+
+    def _to_digest(self):
+        values = np.concatenate(self._exact) if self._exact else np.empty(0)
+        self._exact = []
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._compress(values, np.ones_like(values))
+
+    def _compress(self, means, weights):
+        means = np.concatenate([self._means, means])
+        weights = np.concatenate([self._weights, weights])
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+
+        # k1 scale function: every centroid spans at most one unit of k(q)
+        total = weights.sum()
+        q_left = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        groups = np.floor(k - k[0]).astype(np.int64)
+
+        new_weights = np.bincount(groups, weights=weights)
+        new_means = np.bincount(groups, weights=means * weights)
+        keep = new_weights > 0
+        self._weights = new_weights[keep]
+        self._means = new_means[keep] / self._weights
+
+    def _sorted_exact(self):
+        values = np.sort(np.concatenate(self._exact))
+        self._exact = [values]
+        return values
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        if self.is_exact:
+            return float(sorted_quantile(self._sorted_exact(), q))
+
+        centers = np.cumsum(self._weights) - self._weights / 2
+        xp = np.concatenate([[0.0], centers, [self.count]])
+        fp = np.concatenate([[self.min], self._means, [self.max]])
+        return float(np.interp(q * self.count, xp, fp))
+
+    def median(self):
+        return self.quantile(0.5)
+
+    # Mean of the values between the `proportion` and 1 - `proportion`
+    # quantiles; centroids straddling a cut contribute their overlapping weight.
+    def trimmed_mean(self, proportion):
+        if self.count == 0:
+            return np.nan
+        if self.is_exact:
+            return float(sorted_trimmed_mean(self._sorted_exact(), proportion))
+
+        cut = int(proportion * self.count)
+        right = np.cumsum(self._weights)
+        left = right - self._weights
+        overlap = np.clip(np.minimum(right, self.count - cut) - np.maximum(left, cut), 0, None)
+        if overlap.sum() == 0:
+            return np.nan
+        return float((overlap * self._means).sum() / overlap.sum())
+
+    def statistic(self, kind, param):
+        if kind == "quantile":
+            return self.quantile(param)
+        return self.trimmed_mean(param)
+
+
+# GROUP ACCUMULATOR
+# Evaluates a summary spec (see engine/aggregation.py) over a stream of
+# chunks: running size/count/sum/min/max per group and column, plus one
+# quantile sketch per group and column that serves every order statistic.
+class SourceAccumulator:
+
+    def __init__(self, spec=None, by="source", **sketch_kwargs):
+        self.spec = {name: (col, parse_stat(stat)) for name, (col, stat) in (spec or UPLOAD_SUMMARY).items()}
+        self.by = by
+        self.sketch_kwargs = sketch_kwargs
+        self.moment_columns = sorted({col for col, (kind, _) in self.spec.values() if kind in MOMENT_STATS and kind != "size"})
+        self.order_columns = sorted({col for col, (kind, _) in self.spec.values() if kind not in MOMENT_STATS})
+        self.sources = {}
+
+    def _state(self, src):
+        state = self.sources.get(src)
+        if state is None:
+            state = {
+                "rows": 0,
+                "moments": {col: {"count": 0, "sum": 0.0, "min": np.inf, "max": -np.inf} for col in self.moment_columns},
+                "sketches": {col: QuantileSketch(**self.sketch_kwargs) for col in self.order_columns},
+            }
+            self.sources[src] = state
+        return state
+
+    def update(self, chunk):
+        grouped = chunk.groupby(self.by, sort=False, observed=True)
+        keys = grouped.size()
+        states = [self._state(src) for src in keys.index]
+        for state, rows in zip(states, keys.to_numpy()):
+            state["rows"] += int(rows)
+
+        if self.moment_columns:
+            agg = grouped[self.moment_columns].agg(["count", "sum", "min", "max"])
+            for state, (_, row) in zip(states, agg.iterrows()):
+                for col in self.moment_columns:
+                    m = state["moments"][col]
+                    if row[(col, "count")] == 0:
+                        continue
+                    m["count"] += int(row[(col, "count")])
+                    m["sum"] += row[(col, "sum")]
+                    m["min"] = min(m["min"], row[(col, "min")])
+                    m["max"] = max(m["max"], row[(col, "max")])
+
+        if self.order_columns:
+            codes = grouped.ngroup().to_numpy()
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(states) + 1))
+            for col in self.order_columns:
+                values = chunk[col].to_numpy(dtype=np.float64)[order]
+                for g, state in enumerate(states):
+                    state["sketches"][col].update(values[bounds[g]:bounds[g + 1]])
+        return self
+
+    def merge(self, other):
+        for src, theirs in other.sources.items():
+            state = self._state(src)
+            state["rows"] += theirs["rows"]
+            for col, t in theirs["moments"].items():
+                m = state["moments"][col]
+                m["count"] += t["count"]
+                m["sum"] += t["sum"]
+                m["min"] = min(m["min"], t["min"])
+                m["max"] = max(m["max"], t["max"])
+            for col, sketch in theirs["sketches"].items():
+                state["sketches"][col].merge(sketch)
+        return self
+
+    def _value(self, state, col, kind, param):
+        if kind == "size":
+            return state["rows"]
+        if kind not in MOMENT_STATS:
+            return state["sketches"][col].statistic(kind, param)
+
+        m = state["moments"][col]
+        if kind == "count":
+            return m["count"]
+        if kind == "sum":
+            return m["sum"]
+        if m["count"] == 0:
+            return np.nan
+        if kind == "mean":
+            return m["sum"] / m["count"]
+        return m[kind]
+
+    def result(self):
+        return {
+            src: {name: self._value(state, col, kind, param) for name, (col, (kind, param)) in self.spec.items()}
+            for src, state in self.sources.items()
+        }
+
+
+# STREAMING UPLOAD
+# Reads only the required columns (plus any the spec asks for), `chunksize` rows at a time, so memory is
+# bounded by the chunk size and the sketches, not the file size.
+# `progress(fraction)` is called after every chunk when the total size is known.
+def read_header(file):
+    header = pd.read_csv(file, nrows=0).columns.tolist()
+    file.seek(0)
+    return header
+
+
+def aggregate_upload(file, chunksize=CHUNK_SIZE, progress=None, total_bytes=None, spec=None):
+    accumulator = SourceAccumulator(spec)
+    reader = pd.read_csv(
+        file,
+        usecols=sorted(set(UPLOAD_COLUMNS) | {col for col, _ in accumulator.spec.values()}),
+        chunksize=chunksize,
+        dtype={"source": "object"},
+    )
+    for chunk in reader:
+        with stage("upload.aggregate"):
+            accumulator.update(chunk)
+        if progress is not None and total_bytes:
+            progress(min(file.tell() / total_bytes, 1.0))
+    return accumulator.result()
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from engine.data import DATA_PATH, source_stats
+from engine.models import MODEL_PATH, get_model
+from engine.recommendations import TABLE_PATH, recommendation_table, save_table, saved_table_is_current
+
+# "eager" (default): app.py starts warm_up() in a background thread when the
+# process serves its first session, so the model is loaded while the
+# dashboard renders. "lazy": nothing is loaded until a view needs the model.
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager")
+
+_lock = threading.Lock()
+_timings = {}
+_start_lock = threading.Lock()
+_started = False
+
+
+# WARM-UP
+# Loads the pipeline (and the ML libraries its format needs, see
+# engine/compact.py), builds the predictor, runs one dummy prediction and
+# loads the dataset aggregates and the recommendation table, so the first
+# real request pays none of it. Runs once per process; later calls return
+# the same timings (seconds per step). With `save=True` a stale
+# recommendation table on disk is rebuilt, so the next processes start
+# from it.
+def warm_up(model_path=MODEL_PATH, data_path=DATA_PATH, save=False):
+    with _lock:
+        if _timings:
+            return dict(_timings)
+
+        timings = {}
+
+        def step(name, fn):
+            start = time.perf_counter()
+            fn()
+            timings[name] = time.perf_counter() - start
+
+        step("load_pipeline", lambda: get_model(model_path).features)
+        step("build_predictor", lambda: get_model(model_path).predictor())
+        step("first_prediction", lambda: get_model(model_path).warm())
+        step("dataset", lambda: source_stats(data_path))
+        if save and not saved_table_is_current(TABLE_PATH, model_path, data_path):
+            step("save_table", lambda: save_table(TABLE_PATH, model_path, data_path))
+        step("recommendation_table", lambda: recommendation_table(model_path=model_path, data_path=data_path))
+        timings["total"] = sum(timings.values())
+        _timings.update(timings)
+        return dict(_timings)
+
+
+def format_timings(timings):
+    return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+
+
+# Starts warm_up() in a daemon thread, once per process.
+def start_background():
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+
+    def run():
+        print(f"warm-up: {format_timings(warm_up())}", file=sys.stderr)
+    threading.Thread(target=run, name="warm-up", daemon=True).start()
+
+
+# READINESS PROBE (python -m engine.warmup)
+# Exits 0 once everything is loaded and prints the timings as JSON. Also
+# refreshes the on-disk Parquet copy and recommendation table, which the
+# app process then reads instead of rebuilding them.
+if __name__ == "__main__":
+    print(json.dumps(warm_up(save=True)))
@@ -0,0 +1,125 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from engine.batch import CHUNK_SIZE, rank_frame, write_chunks
+from engine.models import ACTIVE, MODEL_PATH, active_version, get_model
+from engine.storage import POINTER_FILE
+
+# Offline batch scorer (no Streamlit / plotly). Example:
+#   python score_cli.py requisitions.csv -o ranked.parquet --workers 4
+# Input rows need department and job_title; when num_applicants,
+# time_to_hire_days, cost_per_hire and offer_acceptance_rate are present every
+# source is scored with the row's own stats, otherwise with the reference
+# per-source medians (Optimal Score page).
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# INPUT
+def file_format(path):
+    return "parquet" if path.endswith(".parquet") or os.path.isdir(path) else "csv"
+
+
+# A directory is a partitioned dataset (hive-style department=.../ folders are
+# turned back into columns); the app's own <name>.parquet/ store is read from
+# the copy its CURRENT pointer names, not from every version it holds.
+def read_chunks(path, chunksize):
+    if os.path.isdir(path):
+        pointer = os.path.join(path, POINTER_FILE)
+        if os.path.exists(pointer):
+            with open(pointer) as f:
+                path = os.path.join(path, f.read().strip())
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        for batch in dataset.to_batches(batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    elif file_format(path) == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, dtype={"department": "object", "job_title": "object", "source": "object"})
+
+
+# WORKERS
+# Every worker process loads its own copy of the pipeline once, in the pool
+# initializer, and splits the machine's cores with the other workers.
+_worker = {}
+
+
+def init_worker(model_path, weights, threads):
+    model = get_model(model_path)
+    model.features
+    model.predictor().set_threads(threads)
+    _worker.update(model_path=model_path, weights=weights)
+
+
+def rank_chunk(chunk):
+    return rank_frame(chunk, *_worker["weights"], model_path=_worker["model_path"])
+
+
+# Keeps at most `window` chunks in flight and yields results in input order.
+def ordered_map(pool, fn, chunks, window):
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(fn, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank recruitment sources for every requisition in a CSV/Parquet file.")
+    parser.add_argument("input", help="CSV or Parquet file, or partitioned Parquet directory, of requisitions")
+    parser.add_argument("-o", "--output", required=True, help="output file (.csv or .parquet)")
+    parser.add_argument("--time-w", type=float, default=0.4, help="Time Weight (default 0.4)")
+    parser.add_argument("--cost-w", type=float, default=0.4, help="Cost Weight (default 0.4)")
+    parser.add_argument("--oar-w", type=float, default=0.2, help="OAR Weight (default 0.2)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default 1)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help=f"rows per chunk (default {CHUNK_SIZE})")
+    parser.add_argument("--model", default=MODEL_PATH, help="model version from models/manifest.json or a pipeline pickle (default: the active version)")
+    args = parser.parse_args(argv)
+
+    weights = (args.time_w, args.cost_w, args.oar_w)
+    if abs(sum(weights) - 1) >= 0.001:
+        parser.error("--time-w + --cost-w + --oar-w must be 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    # Paths are taken relative to the caller, model/dataset relative to the app
+    input_path = os.path.abspath(args.input)
+    output_path = os.path.abspath(args.output)
+    if os.path.isdir(output_path):
+        parser.error("output must be a .csv or .parquet file, not a directory")
+    model_path = args.model
+    if model_path.endswith(".pkl"):
+        model_path = os.path.abspath(model_path)
+    os.chdir(APP_DIR)
+    # Every worker serves the same version, even if another is activated mid-run
+    if model_path == ACTIVE:
+        model_path = active_version()
+
+    start = time.perf_counter()
+    chunks = read_chunks(input_path, args.chunksize)
+    if args.workers == 1:
+        init_worker(model_path, weights, os.cpu_count() or 1)
+        rows = write_chunks(map(rank_chunk, chunks), output_path, file_format(output_path))
+    else:
+        threads = max(1, (os.cpu_count() or 1) // args.workers)
+        with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(model_path, weights, threads)) as pool:
+            ranked = ordered_map(pool, rank_chunk, chunks, window=2 * args.workers)
+            rows = write_chunks(ranked, output_path, file_format(output_path))
+
+    print(f"{rows} rows -> {output_path} ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import joblib
+import pandas as pd
+import pytest
+
+# The engine resolves the dataset and models/ relative to the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from engine.data import DATA_PATH  # noqa: E402
+from engine.features import FeatureBuilder  # noqa: E402
+from engine.models import active_version  # noqa: E402
+from engine.registry import version_path  # noqa: E402
+
+
+# The active version's pickle with its fitted sklearn / XGBoost objects,
+# whatever MODEL_FORMAT says.
+@pytest.fixture(scope="session")
+def pipeline():
+    return joblib.load(version_path(active_version()))
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    return pd.read_csv(DATA_PATH)
+
+
+# Model input for every row of the bundled CSV
+@pytest.fixture(scope="session")
+def features(pipeline, dataset):
+    return FeatureBuilder(pipeline).build(
+        dataset["department"], dataset["job_title"], dataset["source"], dataset["num_applicants"],
+        dataset["time_to_hire_days"], dataset["cost_per_hire"], dataset["offer_acceptance_rate"],
+    )
@@ -0,0 +1,20 @@
+import numpy as np
+
+from engine.data import DATA_PATH
+from engine.features import ClusterAssigner, check_cluster_assigner
+
+
+# ClusterAssigner against scaler_cluster.transform + kmeans.predict, on every
+# row of the training CSV
+def test_cluster_assigner_matches_kmeans(pipeline):
+    mismatches, rows = check_cluster_assigner(pipeline, DATA_PATH)
+    assert rows > 0
+    assert mismatches == 0
+
+
+# Points at the centroids themselves (in the unscaled space) land in their own cluster
+def test_centroids_assign_to_themselves(pipeline):
+    scaler, kmeans = pipeline["scaler_cluster"], pipeline["kmeans"]
+    centers = scaler.inverse_transform(kmeans.cluster_centers_)
+    assigned = ClusterAssigner(scaler, kmeans).predict(centers)
+    np.testing.assert_array_equal(assigned, np.arange(len(centers)))
@@ -0,0 +1,64 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from engine.compact import OBJECTS_DIR, STORE_DIR, compact_path, export, load, prune
+from engine.features import FeatureBuilder
+from engine.inference import FLAT_MAX_ROWS, make_predictor
+from engine.models import active_version
+from engine.registry import component_hash, file_sha256, version_path
+
+
+# The compact export of the active version against its pickle, exported
+# into a fresh store
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("models"))
+
+
+def _export(store, version):
+    path = version_path(version)
+    pipeline = joblib.load(path)
+    components = {key: component_hash(value) for key, value in pipeline.items()}
+    return export(pipeline, compact_path(os.path.join(store, os.path.basename(path))), file_sha256(path), components)
+
+
+@pytest.fixture(scope="module")
+def compact(store):
+    return load(_export(store, active_version()))[0]
+
+
+# Only the scaler and KMeans arrays are kept
+def test_compact_builds_the_same_features(compact, dataset, features):
+    X = FeatureBuilder(compact).build(
+        dataset["department"], dataset["job_title"], dataset["source"], dataset["num_applicants"],
+        dataset["time_to_hire_days"], dataset["cost_per_hire"], dataset["offer_acceptance_rate"],
+    )
+    np.testing.assert_array_equal(X, features)
+
+
+@pytest.mark.parametrize("backend", ["flat", "booster"])
+def test_compact_matches_sklearn(compact, pipeline, features, backend):
+    expected = make_predictor(pipeline, "sklearn").predict(features)
+    predictor = make_predictor(compact, backend)
+    np.testing.assert_array_equal(predictor.predict(features[:FLAT_MAX_ROWS]), expected[:FLAT_MAX_ROWS])
+    np.testing.assert_array_equal(predictor.predict(features), expected)
+
+
+def test_compact_has_no_sklearn_backend(compact):
+    with pytest.raises(ValueError):
+        make_predictor(compact, "sklearn")
+
+
+# Versions with the same entries point to the same objects, stored once
+def test_versions_share_objects(compact, store):
+    first = load(_export(store, "pipeline_final"))[1]
+    second = load(compact_path(os.path.join(store, "pipeline_final_1.pkl")))[1]
+    shared = first["arrays"].keys() & second["arrays"].keys()
+    assert {name: first["arrays"][name] for name in shared} == {name: second["arrays"][name] for name in shared}
+    assert first["booster"] == second["booster"]
+    objects = os.listdir(os.path.join(store, STORE_DIR, OBJECTS_DIR))
+    assert len(objects) == len(set(first["arrays"].values()) | set(second["arrays"].values())) + 1
+    assert prune(os.path.join(store, STORE_DIR)) == []
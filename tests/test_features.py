@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.features import FeatureBuilder
+
+SAMPLE_EVERY = 25
+
+
+# The per-row generate_features the two prediction pages used before
+# FeatureBuilder: predictpage sets efficiency_score to 0 when the time is not
+# positive, predictup divides by max(time, 0.0001) (time_floor).
+def generate_features(pipeline, dept, job, source, num_applicants, time_to_hire, cost_per_hire, oar, time_floor=None):
+    df = pd.DataFrame([{col: 0 for col in pipeline["preprocess_columns"]}])
+    df["num_applicants"] = num_applicants
+    df["time_to_hire_days"] = time_to_hire
+    df["cost_per_hire"] = cost_per_hire
+    df["offer_acceptance_rate"] = oar
+    if time_floor is not None:
+        df["efficiency_score"] = oar / max(time_to_hire, time_floor)
+    elif time_to_hire > 0:
+        df["efficiency_score"] = oar / time_to_hire
+    else:
+        df["efficiency_score"] = 0
+    df["time_cost_interaction"] = cost_per_hire * time_to_hire
+
+    for col in (f"department_{dept}", f"job_title_{job}", f"source_{source}"):
+        if col in df.columns:
+            df[col] = 1
+
+    X_scaled = pipeline["scaler_cluster"].transform(df[pipeline["cluster_features_columns"]])
+    df["cluster"] = pipeline["kmeans"].predict(X_scaled)
+    return df.reindex(columns=pipeline["feature_cols_model"], fill_value=0)
+
+
+# Every SAMPLE_EVERY-th CSV row, plus rows with no time to hire
+@pytest.mark.parametrize("time_floor", [None, 0.0001])
+def test_builder_matches_generate_features(pipeline, dataset, time_floor):
+    rows = dataset.iloc[::SAMPLE_EVERY]
+    rows = pd.concat([rows, rows.head(5).assign(time_to_hire_days=0)], ignore_index=True)
+    columns = ["department", "job_title", "source", "num_applicants", "time_to_hire_days", "cost_per_hire", "offer_acceptance_rate"]
+
+    X = FeatureBuilder(pipeline).build(*(rows[col] for col in columns), time_floor=time_floor)
+    expected = np.vstack([
+        generate_features(pipeline, *row, time_floor=time_floor).to_numpy(dtype=np.float64)
+        for row in rows[columns].itertuples(index=False)
+    ])
+    np.testing.assert_array_equal(X, expected)
@@ -0,0 +1,18 @@
+import numpy as np
+
+from engine.fused import add_fused_model
+from engine.inference import BoosterPredictor, make_predictor
+
+
+# The three regressors fused into one multi-output booster, in memory or
+# saved with the pipeline, against the pickled XGBRegressors one by one
+def test_fused_model_is_used(pipeline):
+    assert len(BoosterPredictor(pipeline).boosters) == 1
+
+
+def test_fused_matches_sklearn(pipeline, features):
+    expected = make_predictor(pipeline, "sklearn").predict(features)
+    np.testing.assert_array_equal(make_predictor(pipeline, "booster").predict(features), expected)
+
+    saved = add_fused_model(dict(pipeline))
+    np.testing.assert_array_equal(make_predictor(saved, "booster").predict(features), expected)
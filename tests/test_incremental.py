@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from engine import data
+from engine.cube import DIMENSIONS, cube
+from engine.data import DTYPES, kpis, source_stats
+from engine.ingest import ingest
+from engine.storage import append_rows
+
+HISTORY_ROWS = 4000
+
+
+def _sorted_cells(cells):
+    cells = cells.astype({dim: str for dim in DIMENSIONS})
+    return cells.sort_values(DIMENSIONS).reset_index(drop=True)
+
+
+# The aggregates folded forward by ingest() against the same aggregates
+# computed from scratch on a copy holding every row.
+@pytest.fixture
+def ingested(tmp_path, dataset):
+    path = str(tmp_path / "recruitment.csv")
+    dataset.iloc[:HISTORY_ROWS].to_csv(path, index=False)
+    kpis(path), cube(path), source_stats(path)
+
+    # The first 100 new rows repeat recruitment_ids already in the history
+    result = ingest(dataset.iloc[HISTORY_ROWS - 100:], path)
+
+    full = str(tmp_path / "full.csv")
+    dataset.to_csv(full, index=False)
+    return path, full, result
+
+
+def test_ingest_rejects_known_ids(ingested, dataset):
+    _, _, result = ingested
+    assert result["added"] == len(dataset) - HISTORY_ROWS
+    assert result["rejected"] == dataset["recruitment_id"].iloc[HISTORY_ROWS - 100:HISTORY_ROWS].tolist()
+
+
+def test_incremental_kpis(ingested):
+    path, full, _ = ingested
+    incremental, expected = kpis(path), kpis(full)
+    assert incremental.keys() == expected.keys()
+    for key, value in expected.items():
+        assert incremental[key] == pytest.approx(value, rel=1e-12), key
+
+
+def test_incremental_cube(ingested):
+    path, full, _ = ingested
+    pd.testing.assert_frame_equal(
+        _sorted_cells(cube(path)), _sorted_cells(cube(full)), check_dtype=False, rtol=1e-12,
+    )
+
+
+def test_incremental_source_stats(ingested):
+    path, full, _ = ingested
+    incremental, expected = source_stats(path), source_stats(full)
+    assert incremental.keys() == expected.keys()
+    for src, stats in expected.items():
+        assert incremental[src] == pytest.approx(stats, rel=1e-12), src
+
+
+def test_ingest_reads_back_every_row(ingested, dataset):
+    path, _, _ = ingested
+    assert len(pd.read_csv(path)) == len(dataset)
+    assert kpis(path)["recruitment_ids"] == len(dataset)
+
+
+# Rows appended by another process (no apply_delta here) are read from the
+# appended Parquet files alone, never from the whole copy.
+def test_other_process_appends(tmp_path, dataset, monkeypatch):
+    path = str(tmp_path / "recruitment.csv")
+    dataset.iloc[:HISTORY_ROWS].to_csv(path, index=False)
+    kpis(path), cube(path), source_stats(path)
+
+    rows = dataset[list(DTYPES)].astype(DTYPES)
+    append_rows(path, rows.iloc[HISTORY_ROWS:4500], DTYPES)
+    append_rows(path, rows.iloc[4500:], DTYPES)
+
+    def full_read(*args, **kwargs):
+        raise AssertionError("full re-read")
+    with monkeypatch.context() as m:
+        m.setattr(data, "read_parquet", full_read)
+        incremental = kpis(path), cube(path), source_stats(path)
+
+    full = str(tmp_path / "full.csv")
+    dataset.to_csv(full, index=False)
+    assert incremental[0] == pytest.approx(kpis(full), rel=1e-12)
+    pd.testing.assert_frame_equal(
+        _sorted_cells(incremental[1]), _sorted_cells(cube(full)), check_dtype=False, rtol=1e-12,
+    )
+    for src, stats in source_stats(full).items():
+        assert incremental[2][src] == pytest.approx(stats, rel=1e-12), src
@@ -0,0 +1,13 @@
+import numpy as np
+
+from engine.inference import FLAT_MAX_ROWS, make_predictor
+
+
+# The flat NumPy forest, and the flat backend with its switch to XGBoost for
+# large batches, against the pickled XGBRegressors
+def test_flat_forest_matches_sklearn(pipeline, features):
+    expected = make_predictor(pipeline, "sklearn").predict(features)
+    predictor = make_predictor(pipeline, "flat")
+    np.testing.assert_array_equal(predictor.forest.predict(features), expected)
+    np.testing.assert_array_equal(predictor.predict(features[:FLAT_MAX_ROWS]), expected[:FLAT_MAX_ROWS])
+    np.testing.assert_array_equal(predictor.predict(features), expected)
@@ -1,13 +1,104 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import plotly.io
 
-df = pd.read_csv("recruitment_efficiency_improved.csv")
+try:
+    from streamlit.elements.lib.form_utils import current_form_id
+    from streamlit.elements.lib.layout_utils import LayoutConfig
+    from streamlit.elements.lib.utils import compute_and_register_element_id
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+except ImportError:
+    PlotlyChartProto = None
+
+from engine.data import DATA_PATH, memo, kpis
+from engine.cube import APPLICANT_BANDS, cube, rollup
 
 BLUE = ["#1f77b4", "#4fa3d1", "#5dade2", "#2e86c1", "#2471a3", "#154360"]
 
+DIMENSION_LABELS = {
+    "source": "Source",
+    "department": "Department",
+    "job_title": "Job Title",
+    "applicant_band": "Applicants",
+}
+
+
+# FIGURES
+# Built from cube roll-ups (engine/cube.py). The unfiltered views are cached
+# once per dataset version, together with their serialized spec, and shared
+# by every rerun and session; filtered views are rolled up from the cube's
+# cells on demand. Each returns (figure, spec or None).
+def cached_figure(name, filters, compute):
+    if any(filters.values()):
+        return compute(), None
+
+    def serialize():
+        fig = compute()
+        return fig, plotly.io.to_json(fig, validate=False)
+    return memo(name, DATA_PATH, serialize)
+
+
+def department_figure(filters):
+    def compute():
+        dept_count = rollup(cube(), ["department"], filters).sort_values("rows", ascending=False)
+        fig = px.pie(
+            dept_count,
+            names="department",
+            values="rows",
+            color="department",
+            color_discrete_sequence=BLUE,
+        )
+        fig.update_traces(textposition='inside', textinfo='label+percent+value')
+        return fig
+    return cached_figure("fig_department", filters, compute)
+
+
+def source_figure(metric, x, color, filters):
+    def compute():
+        by = [x] if color is None else [x, color]
+        return px.bar(
+            rollup(cube(), by, filters),
+            x=x,
+            y=metric,
+            color=color,
+            barmode="group",
+            labels=DIMENSION_LABELS,
+            hover_data={f"{metric}_std": ":.2f", "rows": True},
+            category_orders={"applicant_band": APPLICANT_BANDS},
+            color_discrete_sequence=BLUE
+        )
+    return cached_figure(f"fig_source_{metric}_{x}_{color}", filters, compute)
+
+
+# CHART
+# st.plotly_chart converts the figure to a dict and then to JSON on every
+# call. A cached spec is sent as is instead, the way st.plotly_chart sends it
+# in the pinned Streamlit (requirements.txt); without those internals, or for
+# filtered views, st.plotly_chart does the work.
+def plotly_chart(figure_spec):
+    figure, spec = figure_spec
+    if spec is None or PlotlyChartProto is None:
+        st.plotly_chart(figure, width="stretch")
+        return
+
+    dg = st._main
+    proto = PlotlyChartProto()
+    proto.theme = "streamlit"
+    proto.form_id = current_form_id(dg)
+    proto.spec = spec
+    proto.config = "{}"
+    proto.id = compute_and_register_element_id(
+        "plotly_chart", user_key=None, key_as_main_identity=False, dg=dg,
+        plotly_spec=proto.spec, plotly_config=proto.config, selection_mode=("points", "box", "lasso"),
+        is_selection_activated=False, theme="streamlit", width="stretch",
+    )
+    dg._enqueue("plotly_chart", proto, layout_config=LayoutConfig(width="stretch"))
+
+
 def run():
 
+    kpi = kpis()
+
     st.markdown("""
         <h1 style="text-align:center; font-size: 48px; font-weight: 800;">
             HR SUMMARY DASHBOARD
@@ -36,36 +127,72 @@ def run():
 
     with m1:
         st.markdown(metric_style.format(
-            title="Avg Cost", value=f"${df['cost_per_hire'].mean():,.0f}"
+            title="Avg Cost", value=f"${kpi['avg_cost']:,.0f}"
         ), unsafe_allow_html=True)
 
     with m2:
         st.markdown(metric_style.format(
-            title="Avg Time", value=f"{df['time_to_hire_days'].mean():.0f} days"
+            title="Avg Time", value=f"{kpi['avg_time']:.0f} days"
         ), unsafe_allow_html=True)
 
     with m3:
         st.markdown(metric_style.format(
-            title="Avg OAR", value=f"{df['offer_acceptance_rate'].mean():.2f}"
+            title="Avg OAR", value=f"{kpi['avg_oar']:.2f}"
         ), unsafe_allow_html=True)
 
     with m4:
         st.markdown(metric_style.format(
-            title="Sum Cost", value=f"${df['cost_per_hire'].sum():,.0f}"
+            title="Sum Cost", value=f"${kpi['sum_cost']:,.0f}"
         ), unsafe_allow_html=True)
 
     with m5:
         st.markdown(metric_style.format(
-            title="Total Applicants", value=f"{len(df):,}"
+            title="Total Applicants", value=f"{kpi['total_applicants']:,}"
         ), unsafe_allow_html=True)
 
     with m6:
         st.markdown(metric_style.format(
-            title="Recruitment ID", value=f"{df['recruitment_id'].nunique()}"
+            title="Recruitment ID", value=f"{kpi['recruitment_ids']}"
         ), unsafe_allow_html=True)
 
     st.markdown("---")
 
+    # FILTERS AND DRILL-DOWN
+    cells = cube()
+
+    f1, f2, f3, f4 = st.columns(4)
+    with f1:
+        departments = st.multiselect("Department", sorted(cells["department"].unique()), key="dash_department")
+    with f2:
+        # Job titles narrowed to the selected departments
+        jobs = cells[cells["department"].isin(departments)] if departments else cells
+        job_titles = st.multiselect("Job Title", sorted(jobs["job_title"].unique()), key="dash_job_title")
+    with f3:
+        sources = st.multiselect("Source", sorted(cells["source"].unique()), key="dash_source")
+    with f4:
+        bands = st.multiselect("Applicants", APPLICANT_BANDS, key="dash_applicant_band")
+
+    filters = {
+        "department": departments,
+        "job_title": job_titles,
+        "source": sources,
+        "applicant_band": bands,
+    }
+
+    d1, d2 = st.columns(2)
+    with d1:
+        x = st.selectbox("Group by", list(DIMENSION_LABELS), format_func=DIMENSION_LABELS.get, key="dash_x")
+    with d2:
+        breakdown = [d for d in DIMENSION_LABELS if d != x]
+        color = st.selectbox("Breakdown", [None] + breakdown,
+                             index=breakdown.index("department") + 1 if "department" in breakdown else 0,
+                             format_func=lambda d: "-" if d is None else DIMENSION_LABELS[d], key="dash_color")
+
+    if any(filters.values()):
+        selected = rollup(cells, filters=filters).iloc[0]
+        st.caption(f"{int(selected['rows']):,} baris terpilih | Avg Time {selected['time_to_hire_days']:.0f} days | "
+                   f"Avg Cost ${selected['cost_per_hire']:,.0f} | Avg OAR {selected['offer_acceptance_rate']:.2f}")
+
     # MAIN VISUALS GRAPHICS
 
     # FIRST ROW
@@ -74,65 +201,23 @@ def run():
     # Distribution of Department
     with c3:
         st.subheader("Distribution of Department")
-        dept_count = df["department"].value_counts().reset_index()
-        dept_count.columns = ["department", "count"]
-
-        fig1 = px.pie(
-            dept_count,
-            names="department",
-            values="count",
-            color="department",
-            color_discrete_sequence=BLUE,
-        )
-        fig1.update_traces(textposition='inside', textinfo='label+percent+value')
-
-        st.plotly_chart(fig1, use_container_width=True)
+        plotly_chart(department_figure(filters))
 
 
     # OAR by Source
     with c4:
-        st.subheader("OAR by Source")
-        oar_df = df.groupby(["source", "department"])["offer_acceptance_rate"].mean().reset_index()
-
-        fig2 = px.bar(
-            oar_df,
-            x="source",
-            y="offer_acceptance_rate",
-            color="department",
-            barmode="group",
-            color_discrete_sequence=BLUE
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        st.subheader(f"OAR by {DIMENSION_LABELS[x]}")
+        plotly_chart(source_figure("offer_acceptance_rate", x, color, filters))
 
     # SECOND ROW
     c1, c2 = st.columns(2)
 
     # Time to Hire by Source
     with c1:
-        st.subheader("Time to Hire by Source")
-        time_df = df.groupby(["source", "department"])["time_to_hire_days"].mean().reset_index()
-
-        fig3 = px.bar(
-            time_df,
-            x="source",
-            y="time_to_hire_days",
-            color="department",
-            barmode="group",
-            color_discrete_sequence=BLUE
-        )
-        st.plotly_chart(fig3, use_container_width=True)
+        st.subheader(f"Time to Hire by {DIMENSION_LABELS[x]}")
+        plotly_chart(source_figure("time_to_hire_days", x, color, filters))
 
     # Cost per Hire by Source
     with c2:
-        st.subheader("Cost per Hire by Source")
-        cost_df = df.groupby(["source", "department"])["cost_per_hire"].mean().reset_index()
-
-        fig4 = px.bar(
-            cost_df,
-            x="source",
-            y="cost_per_hire",
-            color="department",
-            barmode="group",
-            color_discrete_sequence=BLUE
-        )
-        st.plotly_chart(fig4, use_container_width=True)
\ No newline at end of file
+        st.subheader(f"Cost per Hire by {DIMENSION_LABELS[x]}")
+        plotly_chart(source_figure("cost_per_hire", x, color, filters))
\ No newline at end of file
@@ -0,0 +1,34 @@
+import streamlit as st
+import pandas as pd
+
+from engine import metrics
+from engine.cache import predictions
+
+def run():
+
+    with st.expander("🛠 Debug: Stage Timings"):
+
+        stats = metrics.snapshot()
+        if stats:
+            df_stats = pd.DataFrame.from_dict(stats, orient="index")
+            df_stats.index.name = "Stage"
+            st.dataframe(df_stats.style.format({"total_s": "{:.4f}", "mean_ms": "{:.3f}", "max_ms": "{:.3f}"}),
+                         use_container_width=True)
+        else:
+            st.caption("Belum ada timing: jalankan PREDICT atau upload dataset terlebih dahulu.")
+
+        cache = predictions.stats()
+        st.caption(f"Prediction cache: {cache['hits']} hit / {cache['misses']} miss "
+                   f"({cache['hit_rate']:.0%}), {cache['size']}/{cache['maxsize']} entries")
+
+        c1, c2, c3, c4 = st.columns(4)
+        with c1:
+            st.button("Refresh", key="debug_refresh", use_container_width=True)
+        with c2:
+            st.button("Reset", on_click=metrics.reset, key="debug_reset", use_container_width=True)
+        with c3:
+            st.download_button("Prometheus", metrics.prometheus() + predictions.prometheus("recruitment_prediction_cache"), file_name="stage_metrics.prom",
+                               mime="text/plain", key="debug_prom", use_container_width=True)
+        with c4:
+            st.download_button("JSON", metrics.json_line(), file_name="stage_metrics.json",
+                               mime="application/json", key="debug_json", use_container_width=True)
@@ -1,57 +1,11 @@
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
 
-df_raw = pd.read_csv("recruitment_efficiency_improved.csv") 
-
-# LOAD MODEL
-pipeline = joblib.load("models/pipeline_final_1.pkl")
-model_time  = pipeline["model_time"]
-model_cost  = pipeline["model_cost"]
-model_oar   = pipeline["model_oar"]
-scaler_cluster = pipeline["scaler_cluster"]
-scaler_optimal = pipeline["scaler_optimal"]
-kmeans = pipeline["kmeans"]
-
-ohe_columns = pipeline["ohe_columns"]
-preprocess_columns = pipeline["preprocess_columns"]
-feature_cols_original = pipeline["feature_cols_original"]
-cluster_features_columns = pipeline["cluster_features_columns"]
-feature_cols_model = pipeline["feature_cols_model"]
-
-def generate_features(dept, job, source, num_applicants, time_to_hire, cost_per_hire, oar):
-
-    df = pd.DataFrame([{col: 0 for col in preprocess_columns}])
-
-    df["num_applicants"] = num_applicants
-    df["time_to_hire_days"] = time_to_hire
-    df["cost_per_hire"] = cost_per_hire
-    df["offer_acceptance_rate"] = oar
-
-    if time_to_hire > 0:
-        df["efficiency_score"] = oar / time_to_hire
-    else:
-        df["efficiency_score"] = 0
-        
-    df["time_cost_interaction"] = cost_per_hire * time_to_hire
-
-    dcol = f"department_{dept}"
-    jcol = f"job_title_{job}"
-    scol = f"source_{source}"
-
-    if dcol in df.columns: df[dcol] = 1
-    if jcol in df.columns: df[jcol] = 1
-    if scol in df.columns: df[scol] = 1
-
-    df_cluster_input = df[cluster_features_columns]
-
-    X_scaled = scaler_cluster.transform(df_cluster_input)
-    df["cluster"] = kmeans.predict(X_scaled)
-
-    df_final = df.reindex(columns=feature_cols_model, fill_value=0)
-
-    return df_final
+from engine.cache import cached_predictions
+from engine.metrics import stage
+from engine.recommendations import DEPARTMENT_JOBS, rank
+from engine.scoring import win_shares
 
 def get_recommendation_text(source):
     if source == "Referral":
@@ -67,15 +21,16 @@ def get_recommendation_text(source):
 
 def run():
 
-    if 'prediction_run' not in st.session_state:
-        st.session_state.prediction_run = False
-        st.session_state.df_result = None
-        st.session_state.best_result = None
-        st.session_state.dept = None
-        st.session_state.job = None
-        st.session_state.time_w = 0.4
-        st.session_state.cost_w = 0.4
-        st.session_state.oar_w = 0.2
+    if 'predict_run' not in st.session_state:
+        st.session_state.predict_run = False
+        st.session_state.predict_df = None
+        st.session_state.predict_best = None
+        st.session_state.predict_dept = None
+        st.session_state.predict_job = None
+        st.session_state.predict_time_w = 0.4
+        st.session_state.predict_cost_w = 0.4
+        st.session_state.predict_oar_w = 0.2
+        st.session_state.predict_show_details = False
         
     st.markdown("<h1 style='text-align:center;font-size:45px;'>OPTIMAL SCORE PREDICTION</h1>",
                 unsafe_allow_html=True)
@@ -84,14 +39,7 @@ def run():
 
     with col_left:
         
-        department_jobs = {
-            "Engineering": ["Software Engineer","DevOps Engineer","Backend Developer","Data Engineer"],
-            "Sales": ["Account Executive","Business Development Manager","Sales Associate","Sales Representative"],
-            "Product": ["Product Manager","Product Analyst","UX Designer","UI Designer"],
-            "HR": ["HR Coordinator","Recruitment Specialist","Talent Acquisition","HR Manager","Payroll Specialist"],
-            "Marketing": ["Marketing Specialist","Social Media Manager","Content Strategist","SEO Analyst"],
-            "Finance": ["Accountant","Finance Manager","Financial Analyst","Payroll Specialist"]
-        }
+        department_jobs = DEPARTMENT_JOBS
 
         st.subheader("Department")
         dept = st.selectbox("", list(department_jobs.keys()), key='dept_select')
@@ -100,9 +48,9 @@ def run():
 
         st.write("----")
 
-        time_w = st.number_input("Time Weight", 0.0, 1.0, st.session_state.time_w, step=0.01, key='time_w_input')
-        cost_w = st.number_input("Cost Weight", 0.0, 1.0, st.session_state.cost_w, step=0.01, key='cost_w_input')
-        oar_w  = st.number_input("OAR Weight",  0.0, 1.0, st.session_state.oar_w, step=0.01, key='oar_w_input')
+        time_w = st.number_input("Time Weight", 0.0, 1.0, st.session_state.predict_time_w, step=0.01, key='time_w_input')
+        cost_w = st.number_input("Cost Weight", 0.0, 1.0, st.session_state.predict_cost_w, step=0.01, key='cost_w_input')
+        oar_w  = st.number_input("OAR Weight",  0.0, 1.0, st.session_state.predict_oar_w, step=0.01, key='oar_w_input')
 
         valid = abs((time_w+cost_w+oar_w)-1) < 0.001
 
@@ -112,47 +60,31 @@ def run():
         predict = st.button("PREDICT")
 
         def toggle_details():
-            st.session_state.show_details = not st.session_state.show_details
+            st.session_state.predict_show_details = not st.session_state.predict_show_details
     
     if predict and valid:
-        
-        data = df_raw.groupby("source").agg(
-            a=("num_applicants","median"),
-            t=("time_to_hire_days","median"),
-            c=("cost_per_hire","median"),
-            o=("offer_acceptance_rate","mean")
-        ).to_dict('index')
 
-        full = []
-
-        for src, vals in data.items():
-            X = generate_features(
-                dept, job, src,
-                vals["a"], vals["t"], vals["c"], vals["o"] 
-            )
+        # PREDICTION CACHE: process-wide, per (dept, job, stats, model), weights applied below
+        st.session_state.prediction_key_page = (dept, job)
+        st.session_state.predict_show_details = False
 
-            pred_time = model_time.predict(X)[0]
-            pred_cost = model_cost.predict(X)[0]
-            pred_oar  = model_oar.predict(X)[0]
+    # LIVE RE-RANKING: only the weighted sum depends on the weights
+    key = st.session_state.get("prediction_key_page")
+    if key is not None and valid:
 
-            pred_time = max(pred_time, 0.00001)
-            pred_cost = max(pred_cost, 0)
-            pred_oar  = min(max(pred_oar, 0), 1)
+        rows = cached_predictions(*key)
+        optimal = rank(rows, time_w, cost_w, oar_w)
 
-            scaled = scaler_optimal.transform([[pred_time, pred_cost, pred_oar]])
-            optimal = (
-                time_w * (1 - scaled[0][0]) +
-                cost_w * (1 - scaled[0][1]) +
-                oar_w * scaled[0][2]
-            )
+        full = []
 
+        for i, row in enumerate(rows.itertuples(index=False)):
             full.append([
-                src, 
-                round(pred_time), 
-                round(pred_cost), 
-                round(pred_oar,2), 
-                round(optimal,4),
-                scaled[0][0], scaled[0][1], scaled[0][2]
+                row.source, 
+                round(row.pred_time), 
+                round(row.pred_cost), 
+                round(row.pred_oar,2), 
+                round(optimal[i],4),
+                row.scaled_time, row.scaled_cost, row.scaled_oar
             ])
 
         df = pd.DataFrame(full, columns=[
@@ -161,23 +93,22 @@ def run():
         ])
         df = df.sort_values(by="Optimal Score", ascending=False)
         
-        st.session_state.prediction_run = True
-        st.session_state.df_result = df
-        st.session_state.best_result = df.iloc[0]
-        st.session_state.dept = dept
-        st.session_state.job = job
-        st.session_state.time_w = time_w
-        st.session_state.cost_w = cost_w
-        st.session_state.oar_w = oar_w
-        st.session_state.show_details = False 
+        st.session_state.predict_run = True
+        st.session_state.predict_df = df
+        st.session_state.predict_best = df.iloc[0]
+        st.session_state.predict_dept = key[0]
+        st.session_state.predict_job = key[1]
+        st.session_state.predict_time_w = time_w
+        st.session_state.predict_cost_w = cost_w
+        st.session_state.predict_oar_w = oar_w
     
     with col_right:
         st.subheader("Prediction Result")
         
-        if st.session_state.prediction_run:
+        if st.session_state.predict_run:
             
-            df = st.session_state.df_result
-            best = st.session_state.best_result
+            df = st.session_state.predict_df
+            best = st.session_state.predict_best
             
             best_source = best["Source"]
             score_val = round(best["Optimal Score"], 4)
@@ -185,12 +116,12 @@ def run():
             cost_val = round(best["Pred Cost"], 2)
             oar_val = round(best["Pred OAR"], 2)
             
-            time_w_used = st.session_state.time_w
-            cost_w_used = st.session_state.cost_w
-            oar_w_used = st.session_state.oar_w
+            time_w_used = st.session_state.predict_time_w
+            cost_w_used = st.session_state.predict_cost_w
+            oar_w_used = st.session_state.predict_oar_w
             
-            dept_used = st.session_state.dept
-            job_used = st.session_state.job
+            dept_used = st.session_state.predict_dept
+            job_used = st.session_state.predict_job
             
             # CUSTOM TABLE CSS
             table_css = """
@@ -229,9 +160,10 @@ def run():
             """
             st.markdown(table_css, unsafe_allow_html=True)
             
-            df_display = df[["Source","Pred Time","Pred Cost","Pred OAR","Optimal Score"]]
-            html_table = df_display.to_html(index=False, classes="custom-table")
-            st.markdown(html_table, unsafe_allow_html=True)
+            with stage("render.table"):
+                df_display = df[["Source","Pred Time","Pred Cost","Pred OAR","Optimal Score"]]
+                html_table = df_display.to_html(index=False, classes="custom-table")
+                st.markdown(html_table, unsafe_allow_html=True)
 
             st.write("---")
             
@@ -299,10 +231,18 @@ def run():
             with c_met4:
                 st.markdown(metric_card_new("Optimal Score", f"{score_val:.4f}", "", color="#b00000"), unsafe_allow_html=True)
                 
+            # SENSITIVITY SWEEP
+            with st.expander("Sensitivitas Bobot"):
+                shares = win_shares(df[["Scaled Time", "Scaled Cost", "Scaled OAR"]].to_numpy())
+                df_sweep = pd.DataFrame({"Source": df["Source"], "Terbaik di (% kombinasi bobot)": (shares * 100).round(1)})
+                df_sweep = df_sweep.sort_values(by="Terbaik di (% kombinasi bobot)", ascending=False)
+                st.markdown(df_sweep.to_html(index=False, classes="custom-table"), unsafe_allow_html=True)
+                st.caption("Semua kombinasi Time/Cost/OAR Weight dengan step 0.05 (total = 1).")
+                
             st.write("----")
 
             # PENJELASAN DETAIL
-            if st.session_state.show_details:
+            if st.session_state.predict_show_details:
 
                 t_scaled = best["Scaled Time"]
                 c_scaled = best["Scaled Cost"]
@@ -1,46 +1,15 @@
+import os
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
 
+from engine.batch import DOWNLOAD_MAX_BYTES, ROW_COLUMNS, score_to_file
+from engine.cache import cached_predictions
+from engine.metrics import stage
+from engine.recommendations import DEPARTMENT_JOBS
+from engine.scoring import SCALED_COLUMNS, optimal_score, stats_hash, win_shares
+from engine.streaming import UPLOAD_COLUMNS, read_header, aggregate_upload
 
-#  LOAD PIPELINE
-pipeline = joblib.load("models/pipeline_final_1.pkl")
-model_time  = pipeline["model_time"]
-model_cost  = pipeline["model_cost"]
-model_oar   = pipeline["model_oar"]
-scaler_cluster = pipeline["scaler_cluster"]
-scaler_optimal = pipeline["scaler_optimal"]
-kmeans = pipeline["kmeans"]
-
-preprocess_columns = pipeline["preprocess_columns"]
-cluster_features_columns = pipeline["cluster_features_columns"]
-feature_cols_model = pipeline["feature_cols_model"]
-
-# FEATURE GENERATOR
-def generate_features(dept, job, source, num_applicants, time_to_hire, cost_per_hire, oar):
-    df = pd.DataFrame([{col: 0 for col in preprocess_columns}])
-    df["num_applicants"] = num_applicants
-    df["time_to_hire_days"] = time_to_hire
-    df["cost_per_hire"] = cost_per_hire
-    df["offer_acceptance_rate"] = oar
-    df["efficiency_score"] = oar / max(time_to_hire, 0.0001)
-    df["time_cost_interaction"] = cost_per_hire * time_to_hire
-
-    dcol = f"department_{dept}"
-    jcol = f"job_title_{job}"
-    scol = f"source_{source}"
-
-    if dcol in df.columns: df[dcol] = 1
-    if jcol in df.columns: df[jcol] = 1
-    if scol in df.columns: df[scol] = 1
-
-    df_cluster_input = df[cluster_features_columns]
-    X_scaled = scaler_cluster.transform(df_cluster_input)
-    df["cluster"] = kmeans.predict(X_scaled)
-
-    df_final = df.reindex(columns=feature_cols_model, fill_value=0)
-    return df_final
 
 #  RECOMMENDATION TEXT 
 def get_recommendation_text(source):
@@ -56,16 +25,16 @@ def get_recommendation_text(source):
         return "Penjelasan kontekstual tidak tersedia untuk sumber ini."
 
 def run():
-    if 'prediction_run' not in st.session_state:
-        st.session_state.prediction_run = False
-        st.session_state.df_result = None
-        st.session_state.best_result = None
-        st.session_state.dept = None
-        st.session_state.job = None
-        st.session_state.time_w = 0.4
-        st.session_state.cost_w = 0.4
-        st.session_state.oar_w = 0.2
-        st.session_state.show_details = False
+    if 'upload_run' not in st.session_state:
+        st.session_state.upload_run = False
+        st.session_state.upload_df = None
+        st.session_state.upload_best = None
+        st.session_state.upload_dept = None
+        st.session_state.upload_job = None
+        st.session_state.upload_time_w = 0.4
+        st.session_state.upload_cost_w = 0.4
+        st.session_state.upload_oar_w = 0.2
+        st.session_state.upload_show_details = False
         
     st.markdown("<h1 style='text-align:center;font-size:45px;'>OPTIMAL SCORE PREDICTION</h1>", unsafe_allow_html=True)
 
@@ -78,41 +47,36 @@ def run():
         source_data = None
 
         if uploaded:
-            df_user = pd.read_csv(uploaded)
-            required = ["time_to_hire_days","cost_per_hire","offer_acceptance_rate", "source"]
+            header = read_header(uploaded)
+            required = UPLOAD_COLUMNS
             
-            if not all(col in df_user.columns for col in required):
+            if not all(col in header for col in required):
                 st.error(f"❌ Dataset harus memiliki kolom: {', '.join(required)}")
                 return
 
             st.success("✔ Dataset berhasil dibaca")
             st.subheader("Uploaded Dataset Preview")
-            st.dataframe(df_user.head(), use_container_width=True)
-
-            unique_sources = df_user["source"].unique()
+            st.dataframe(pd.read_csv(uploaded, nrows=5), use_container_width=True)
+            uploaded.seek(0)
+
+            # STREAMING AGGREGATION (once per uploaded file)
+            if st.session_state.get("upload_file_id") != uploaded.file_id:
+                bar = st.progress(0.0, text="Memproses dataset...")
+                st.session_state.upload_source_data = aggregate_upload(
+                    uploaded, progress=bar.progress, total_bytes=uploaded.size
+                )
+                st.session_state.upload_file_id = uploaded.file_id
+                st.session_state.upload_hash = stats_hash(st.session_state.upload_source_data)
+                bar.empty()
+
+            source_data = st.session_state.upload_source_data
+            unique_sources = list(source_data.keys())
             
             if len(unique_sources) < 4:
                 st.warning(f"⚠️ Dataset hanya memiliki {len(unique_sources)} source: {list(unique_sources)}")
                 st.info("💡 Untuk hasil optimal, dataset sebaiknya mencakup: Referral, LinkedIn, Job Portal, Recruiter")
-
-            source_data = {}
-            for src in unique_sources:
-                df_src = df_user[df_user["source"] == src]
-                source_data[src] = {
-                    "a": len(df_src),
-                    "t": df_src["time_to_hire_days"].median(),
-                    "c": df_src["cost_per_hire"].median(),
-                    "o": df_src["offer_acceptance_rate"].mean()
-                }
             
-        department_jobs = {
-            "Engineering": ["Software Engineer","DevOps Engineer","Backend Developer","Data Engineer"],
-            "Sales": ["Account Executive","Business Development Manager","Sales Associate","Sales Representative"],
-            "Product": ["Product Manager","Product Analyst","UX Designer","UI Designer"],
-            "HR": ["HR Coordinator","Recruitment Specialist","Talent Acquisition","HR Manager","Payroll Specialist"],
-            "Marketing": ["Marketing Specialist","Social Media Manager","Content Strategist","SEO Analyst"],
-            "Finance": ["Accountant","Finance Manager","Financial Analyst","Payroll Specialist"]
-        }
+        department_jobs = DEPARTMENT_JOBS
 
         st.subheader("Department")
         dept = st.selectbox("", list(department_jobs.keys()), key="dept_up")
@@ -121,9 +85,9 @@ def run():
 
         st.write("----")
 
-        time_w = st.number_input("Time Weight", 0.0, 1.0, st.session_state.time_w, step=0.01, key="w_time_up")
-        cost_w = st.number_input("Cost Weight", 0.0, 1.0, st.session_state.cost_w, step=0.01, key="w_cost_up")
-        oar_w  = st.number_input("OAR Weight", 0.0, 1.0, st.session_state.oar_w, step=0.01, key="w_oar_up")
+        time_w = st.number_input("Time Weight", 0.0, 1.0, st.session_state.upload_time_w, step=0.01, key="w_time_up")
+        cost_w = st.number_input("Cost Weight", 0.0, 1.0, st.session_state.upload_cost_w, step=0.01, key="w_cost_up")
+        oar_w  = st.number_input("OAR Weight", 0.0, 1.0, st.session_state.upload_oar_w, step=0.01, key="w_oar_up")
 
         valid = abs((time_w+cost_w+oar_w)-1) < 0.001
         if valid: st.success("✔ Total weight valid")
@@ -131,61 +95,78 @@ def run():
 
         predict = st.button("PREDICT", disabled=not(uploaded and valid), key="predict_up")
 
+        # ROW-LEVEL BATCH SCORING
+        if uploaded:
+            st.write("----")
+            st.subheader("Batch Scoring (per baris)")
+            missing = [col for col in ROW_COLUMNS if col not in header]
+
+            if missing:
+                st.info(f"💡 Untuk skor per baris, dataset juga harus memiliki kolom: {', '.join(missing)}")
+            else:
+                fmt = st.selectbox("Format", ["csv", "parquet"], key="batch_fmt_up")
+
+                if st.button("SCORE ALL ROWS", disabled=not valid, key="batch_up"):
+                    previous = st.session_state.get("batch_result")
+                    if previous and os.path.exists(previous["path"]):
+                        os.remove(previous["path"])
+                    st.session_state.batch_result = None
+
+                    bar = st.progress(0.0, text="Scoring...")
+                    uploaded.seek(0)
+                    try:
+                        path = score_to_file(uploaded, time_w, cost_w, oar_w, fmt=fmt,
+                                             progress=bar.progress, total_bytes=uploaded.size)
+                        st.session_state.batch_result = {"file_id": uploaded.file_id, "path": path, "fmt": fmt,
+                                                         "weights": (time_w, cost_w, oar_w)}
+                    except ValueError as e:
+                        st.error(f"❌ Gagal melakukan scoring: {e}")
+                    bar.empty()
+
+                # DOWNLOAD: the file is read into memory only for the run
+                # after PREPARE DOWNLOAD, not on every rerun
+                result = st.session_state.get("batch_result")
+                if result and result["file_id"] == uploaded.file_id and os.path.exists(result["path"]):
+                    size = os.path.getsize(result["path"])
+                    if result["weights"] != (time_w, cost_w, oar_w):
+                        used = ", ".join(f"{w:.2f}" for w in result["weights"])
+                        st.warning(f"⚠️ Bobot sudah berubah: file ini di-scoring dengan bobot Time/Cost/OAR = {used}. Klik SCORE ALL ROWS lagi untuk bobot saat ini.")
+                    if size > DOWNLOAD_MAX_BYTES:
+                        st.warning(f"⚠️ Hasil scoring terlalu besar untuk diunduh lewat browser ({size / 1024 ** 2:.0f} MB > {DOWNLOAD_MAX_BYTES / 1024 ** 2:.0f} MB). Gunakan score_cli.py untuk dataset sebesar ini.")
+                    elif st.button("PREPARE DOWNLOAD", use_container_width=True, key="batch_prepare_up"):
+                        with open(result["path"], "rb") as f:
+                            st.download_button(
+                                "⬇ Download hasil scoring", f,
+                                file_name=f"scored_{uploaded.name.rsplit('.', 1)[0]}.{result['fmt']}",
+                                use_container_width=True, key="batch_download_up", on_click="ignore"
+                            )
+
     def toggle_details():
-        st.session_state.show_details = not st.session_state.show_details
+        st.session_state.upload_show_details = not st.session_state.upload_show_details
 
     # --- PREDICTION LOGIC ---
+    # PREDICTION CACHE: process-wide, per (dept, job, upload stats, model), weights applied below
     if predict and uploaded and valid:
-        full = []
-        all_pred_time = []
-        all_pred_cost = []
-        all_pred_oar = []
+        key = (dept, job, st.session_state.upload_hash)
+        st.session_state.prediction_key_up = key
+        st.session_state.upload_show_details = False
 
-        for src, vals in source_data.items():
-            X = generate_features(dept, job, src, vals["a"], vals["t"], vals["c"], vals["o"])
-
-            pred_time_raw = model_time.predict(X)[0]
-            pred_cost_raw = model_cost.predict(X)[0]
-            pred_oar_raw = model_oar.predict(X)[0]
-            
-            pred_time = max(pred_time_raw, 0.00001)
-            pred_cost = max(pred_cost_raw, 0)
-            pred_oar  = min(max(pred_oar_raw, 0), 1)
-            
-            all_pred_time.append(pred_time)
-            all_pred_cost.append(pred_cost)
-            all_pred_oar.append(pred_oar)
-        
-        time_min, time_max = min(all_pred_time), max(all_pred_time)
-        cost_min, cost_max = min(all_pred_cost), max(all_pred_cost)
-        oar_min, oar_max = min(all_pred_oar), max(all_pred_oar)
-        
-        time_range = max(time_max - time_min, 0.00001)
-        cost_range = max(cost_max - cost_min, 0.00001)
-        oar_range = max(oar_max - oar_min, 0.00001)
-        
-        for i, (src, vals) in enumerate(source_data.items()):
-            pred_time = all_pred_time[i]
-            pred_cost = all_pred_cost[i]
-            pred_oar = all_pred_oar[i]
-            
-            time_scaled = (pred_time - time_min) / time_range
-            cost_scaled = (pred_cost - cost_min) / cost_range
-            oar_scaled = (pred_oar - oar_min) / oar_range
-            
-            optimal = (
-                time_w * (1 - time_scaled) +
-                cost_w * (1 - cost_scaled) +
-                oar_w * oar_scaled
-            )
+    # LIVE RE-RANKING: only the weighted sum depends on the weights
+    key = st.session_state.get("prediction_key_up")
+    if key is not None and uploaded and key[2] == st.session_state.upload_hash and valid:
+        scores = cached_predictions(dept=key[0], job=key[1], source_data=st.session_state.upload_source_data,
+                                    scaling="relative", time_floor=0.0001)
+        optimal = optimal_score(scores[SCALED_COLUMNS].to_numpy(), time_w, cost_w, oar_w)
 
+        full = []
+        for i, row in enumerate(scores.itertuples(index=False)):
             full.append([
-                src, 
-                round(pred_time), 
-                round(pred_cost), 
-                round(pred_oar, 2), 
-                round(optimal, 4),
-                time_scaled, cost_scaled, oar_scaled
+                row.source, 
+                round(row.pred_time), 
+                round(row.pred_cost), 
+                round(row.pred_oar, 2), 
+                round(optimal[i], 4),
+                row.scaled_time, row.scaled_cost, row.scaled_oar
             ])
 
         df_pred = pd.DataFrame(full, columns=[
@@ -194,23 +175,22 @@ def run():
         ])
         df_pred = df_pred.sort_values(by="Optimal Score", ascending=False)
         
-        st.session_state.prediction_run = True
-        st.session_state.df_result = df_pred
-        st.session_state.best_result = df_pred.iloc[0]
-        st.session_state.dept = dept
-        st.session_state.job = job
-        st.session_state.time_w = time_w
-        st.session_state.cost_w = cost_w
-        st.session_state.oar_w = oar_w
-        st.session_state.show_details = False
+        st.session_state.upload_run = True
+        st.session_state.upload_df = df_pred
+        st.session_state.upload_best = df_pred.iloc[0]
+        st.session_state.upload_dept = key[0]
+        st.session_state.upload_job = key[1]
+        st.session_state.upload_time_w = time_w
+        st.session_state.upload_cost_w = cost_w
+        st.session_state.upload_oar_w = oar_w
 
     # RIGHT COLUMN
     with col_right:
         st.subheader("Prediction Result")
         
-        if st.session_state.prediction_run:
-            df = st.session_state.df_result
-            best = st.session_state.best_result
+        if st.session_state.upload_run:
+            df = st.session_state.upload_df
+            best = st.session_state.upload_best
             
             best_source = best["Source"]
             score_val = round(best["Optimal Score"], 4)
@@ -218,12 +198,12 @@ def run():
             cost_val = round(best["Pred Cost"], 2)
             oar_val = round(best["Pred OAR"], 2)
             
-            time_w_used = st.session_state.time_w
-            cost_w_used = st.session_state.cost_w
-            oar_w_used = st.session_state.oar_w
+            time_w_used = st.session_state.upload_time_w
+            cost_w_used = st.session_state.upload_cost_w
+            oar_w_used = st.session_state.upload_oar_w
             
-            dept_used = st.session_state.dept
-            job_used = st.session_state.job
+            dept_used = st.session_state.upload_dept
+            job_used = st.session_state.upload_job
             
             # CSS TABLE
             table_css = """
@@ -255,8 +235,9 @@ def run():
             """
             st.markdown(table_css, unsafe_allow_html=True)
             
-            df_display = df[["Source","Pred Time","Pred Cost","Pred OAR","Optimal Score"]]
-            st.markdown(df_display.to_html(index=False, classes="custom-table"), unsafe_allow_html=True)
+            with stage("render.table"):
+                df_display = df[["Source","Pred Time","Pred Cost","Pred OAR","Optimal Score"]]
+                st.markdown(df_display.to_html(index=False, classes="custom-table"), unsafe_allow_html=True)
 
             st.write("---")
             
@@ -322,10 +303,18 @@ def run():
             with c4:
                 st.markdown(metric_card("Optimal Score", f"{score_val:.4f}", "", color="#b00000"), unsafe_allow_html=True)
                 
+            # SENSITIVITY SWEEP
+            with st.expander("Sensitivitas Bobot"):
+                shares = win_shares(df[["Scaled Time", "Scaled Cost", "Scaled OAR"]].to_numpy())
+                df_sweep = pd.DataFrame({"Source": df["Source"], "Terbaik di (% kombinasi bobot)": (shares * 100).round(1)})
+                df_sweep = df_sweep.sort_values(by="Terbaik di (% kombinasi bobot)", ascending=False)
+                st.markdown(df_sweep.to_html(index=False, classes="custom-table"), unsafe_allow_html=True)
+                st.caption("Semua kombinasi Time/Cost/OAR Weight dengan step 0.05 (total = 1).")
+                
             st.write("----")
 
             # DETAILED EXPLANATION
-            if st.session_state.show_details:
+            if st.session_state.upload_show_details:
                 t_scaled = best["Scaled Time"]
                 c_scaled = best["Scaled Cost"]
                 o_scaled = best["Scaled OAR"]
@@ -0,0 +1,81 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from engine.cache import cached_predictions
+from engine.recommendations import DEPARTMENT_JOBS
+from engine.scoring import SCALED_COLUMNS, winner_map
+
+SOURCE_COLORS = {
+    "Job Portal": "#5dade2",
+    "LinkedIn": "#2471a3",
+    "Recruiter": "#154360",
+    "Referral": "#b00000",
+}
+
+def run():
+
+    st.markdown("<h1 style='text-align:center;font-size:45px;'>WEIGHT SENSITIVITY MAP</h1>",
+                unsafe_allow_html=True)
+
+    col_left, col_right = st.columns([1,2.5])
+
+    with col_left:
+        st.subheader("Department")
+        dept = st.selectbox("", list(DEPARTMENT_JOBS.keys()), key="dept_map")
+        st.subheader("Job Title")
+        job  = st.selectbox("", DEPARTMENT_JOBS[dept], key="job_map")
+
+        st.write("----")
+
+        step = st.select_slider("Grid Step", options=[0.05, 0.02, 0.01], value=0.01, key="step_map")
+
+        # Nothing is predicted until the first SHOW MAP (all tabs render on
+        # the first load); the map then follows the selection.
+        if st.button("SHOW MAP", key="show_map"):
+            st.session_state.map_run = True
+
+    if not st.session_state.get("map_run"):
+        with col_right:
+            st.info("Pilih Department dan Job Title, lalu klik SHOW MAP.")
+        return
+
+    # Same cached predictions as the Optimal Score page
+    rows = cached_predictions(dept, job)
+
+    # Every weight combination on the grid in one matrix product
+    grid, winner, margin = winner_map(rows[SCALED_COLUMNS].to_numpy(), step)
+    sources = rows["source"].to_numpy()
+
+    df_map = pd.DataFrame({
+        "Time Weight": grid[:, 0],
+        "Cost Weight": grid[:, 1],
+        "OAR Weight": grid[:, 2],
+        "Best Source": sources[winner],
+        "Margin": margin,
+    })
+
+    with col_left:
+        st.subheader("Win Share")
+        df_share = df_map["Best Source"].value_counts(normalize=True).mul(100).round(1).reset_index()
+        df_share.columns = ["Source", "Terbaik di (% kombinasi bobot)"]
+        st.dataframe(df_share, hide_index=True, use_container_width=True)
+        st.caption(f"{len(df_map):,} kombinasi Time/Cost/OAR Weight (step {step}, total = 1).")
+
+    with col_right:
+        st.subheader(f"Best Source per Weight: {job} ({dept})")
+
+        fig = px.scatter_ternary(
+            df_map,
+            a="Time Weight",
+            b="Cost Weight",
+            c="OAR Weight",
+            color="Best Source",
+            hover_data={"Margin": ":.4f"},
+            color_discrete_map=SOURCE_COLORS,
+        )
+        fig.update_traces(marker=dict(symbol="hexagon", size=step * 550, line=dict(width=0)))
+        fig.update_layout(height=650, legend_title_text="Best Source")
+
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption("Margin: selisih Optimal Score antara source terbaik dan source kedua pada bobot tersebut.")